@@ -3,109 +3,189 @@ Quick balanced test of the enhanced cloud storage simulation
 """
 
 import asyncio
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
-import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
 
-# Add the current directory to the path so we can import the simulation
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Prefer uvloop's libuv-based event loop when it is available
+loop_factory = None  # asyncio.Runner falls back to the default loop
+if sys.platform != "win32":
+    try:
+        import uvloop
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        pass  # uvloop not installed (or failed to build) - keep the stdlib loop
+else:
+    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
-# Now import our simulation modules
+# Import our simulation modules (the script's directory is already sys.path[0])
 from enhanced_cloud_storage import (
-    run_single_simulation, global_metrics, BuyerAgent, 
+    run_single_simulation, SimulationMetrics, BuyerAgent, 
     StorageProviderAgent, IntermediaryNetworkAgent, MessageBus
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, 
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Configure logging: agents only enqueue records, a background listener
+# thread formats and writes them so the event loop never blocks on I/O
+log_queue = queue.Queue(-1)
+stream_handler = logging.StreamHandler()
+stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+log_listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+root_logger = logging.getLogger()
+root_logger.handlers[:] = [logging.handlers.QueueHandler(log_queue)]  # Replaces enhanced_cloud_storage's handler
+root_logger.setLevel(logging.INFO)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logger = logging.getLogger("QuickTest")
 
-async def balanced_test():
-    """Run a balanced test with matching price ranges"""
-    logger.info("🧪 Running balanced test simulation...")
+@dataclass(frozen=True, slots=True)
+class TestConfig:
+    """Parameters of a balanced test scenario"""
+    n_providers: int = 2
+    n_buyers: int = 2
+    total_space_gb: int = 150  # Smaller for testing
+    base_price: float = 0.4  # Lower base price
+    failure_prob: float = 0.05  # Lower failure rate for testing
+    budget: float = 25.0  # Higher budget to match provider prices
+    request_interval: Tuple[float, float] = (3.0, 6.0)
+    duration_s: float = 15.0
+    corruption_prob: float = 0.02
+    target_requests: int = 8  # Stop early once this many requests have been answered
+
+async def run_scenario(cfg: TestConfig) -> Dict[str, Any]:
+    """Run one scenario with its own message bus and metrics"""
+    # Scenario-local metrics so several scenarios can share the event loop
+    scenario_metrics = SimulationMetrics()
     
-    # Reset global metrics
-    global_metrics.reset()
+    # Signalled by the metrics collector when the request target is reached
+    done = asyncio.Event()
+    scenario_metrics.set_request_target(cfg.target_requests, done)
     
     # Create message bus
-    message_bus = MessageBus()
+    message_bus = MessageBus(scenario_metrics)
     
     # Create network agent
-    network = IntermediaryNetworkAgent("network", message_bus, corruption_probability=0.02)
-    await network.start()
+    network = IntermediaryNetworkAgent("network", message_bus, corruption_probability=cfg.corruption_prob,
+                                       metrics=scenario_metrics)
     
     # Create provider agents with reasonable prices
-    providers = []
-    for i in range(2):
-        provider = StorageProviderAgent(
+    providers = [
+        StorageProviderAgent(
             agent_id=f"provider{i}",
             broker_id="network",
             message_bus=message_bus,
-            total_space_gb=150,  # Smaller for testing
-            base_price_per_gb_hour=0.4,  # Lower base price
-            failure_probability=0.05  # Lower failure rate for testing
+            total_space_gb=cfg.total_space_gb,
+            base_price_per_gb_hour=cfg.base_price,
+            failure_probability=cfg.failure_prob,
+            metrics=scenario_metrics
         )
-        providers.append(provider)
-        await provider.start()
-        await asyncio.sleep(0.5)
+        for i in range(cfg.n_providers)
+    ]
     
     # Create buyer agents with matching budgets
-    buyers = []
-    for i in range(2):
-        buyer = BuyerAgent(
+    buyers = [
+        BuyerAgent(
             agent_id=f"buyer{i}",
             broker_id="network",
             message_bus=message_bus,
-            request_interval=(3.0, 6.0),
-            budget_per_hour=25.0  # Higher budget to match provider prices
+            request_interval=cfg.request_interval,
+            budget_per_hour=cfg.budget,
+            metrics=scenario_metrics
         )
-        buyers.append(buyer)
-        await buyer.start()
-        await asyncio.sleep(0.5)
-    
-    # Let simulation run for 15 seconds
-    logger.info("⏱️ Running simulation for 15 seconds...")
-    await asyncio.sleep(15)
-    
-    # Stop all agents
-    for agent in [network] + providers + buyers:
-        await agent.stop()
+        for i in range(cfg.n_buyers)
+    ]
     
-    # Wait for final processing
-    await asyncio.sleep(1)
+    # Agent lifetimes are scoped to the task group: any agent failure cancels
+    # the others, and leaving the block joins every agent after it drained
+    stop_event = asyncio.Event()
+    async with asyncio.TaskGroup() as tg:
+        for agent in (network, *providers):
+            tg.create_task(agent.run(stop_event))
+        
+        # Buyers start once the providers' registrations are queued
+        await asyncio.gather(*(provider.started.wait() for provider in providers))
+        for buyer in buyers:
+            tg.create_task(buyer.run(stop_event))
+        
+        # Let simulation run until the request target is reached (at most cfg.duration_s)
+        logger.info(f"⏱️ Running simulation for up to {cfg.duration_s:g} seconds...")
+        try:
+            await asyncio.wait_for(done.wait(), timeout=cfg.duration_s)
+        except asyncio.TimeoutError:
+            pass
+        
+        # Stop all agents
+        stop_event.set()
     
     # Get metrics
-    metrics = global_metrics.get_summary()
+    metrics = scenario_metrics.get_summary()
     
-    # Display results
-    logger.info("📊 SIMULATION RESULTS:")
-    logger.info(f"   Requests: {metrics['requests']['total']}")
-    logger.info(f"   Success Rate: {metrics['requests']['success_rate']:.1f}%")
-    logger.info(f"   Avg Response Time: {metrics['requests']['avg_response_time']:.2f}s")
-    logger.info(f"   Contracts Created: {metrics['contracts']['created']}")
-    logger.info(f"   Provider Utilization: {metrics['providers']['avg_utilization']:.2f}")
-    logger.info(f"   Total Earnings: ${metrics['providers']['total_earnings']:.2f}")
-    logger.info(f"   Network Corruptions: {metrics['network']['corruptions']}")
+    # Display results as a single log record
+    if logger.isEnabledFor(logging.INFO):
+        req = metrics['requests']
+        contracts = metrics['contracts']
+        provs = metrics['providers']
+        net = metrics['network']
+        report = [
+            "📊 SIMULATION RESULTS:",
+            f"   Requests: {req['total']}",
+            f"   Success Rate: {req['success_rate']:.1f}%",
+            f"   Avg Response Time: {req['avg_response_time']:.2f}s",
+            f"   Contracts Created: {contracts['created']}",
+            f"   Provider Utilization: {provs['avg_utilization']:.2f}",
+            f"   Total Earnings: ${provs['total_earnings']:.2f}",
+            f"   Network Corruptions: {net['corruptions']}",
+        ]
+        
+        # Show agent stats
+        report.append("🏢 Network Stats:")
+        report.extend(f"   {key}: {value}" for key, value in network.stats.items())
+        
+        report.append("💾 Provider Stats:")
+        report.extend(f"   Provider {i}: {provider.stats}" for i, provider in enumerate(providers))
+        
+        report.append("🛒 Buyer Stats:")
+        report.extend(f"   Buyer {i}: {buyer.stats}" for i, buyer in enumerate(buyers))
+        
+        logger.info("\n%s", "\n".join(report))
     
-    # Show agent stats
-    logger.info("🏢 Network Stats:")
-    for key, value in network.stats.items():
-        logger.info(f"   {key}: {value}")
-    
-    logger.info("💾 Provider Stats:")
-    for i, provider in enumerate(providers):
-        logger.info(f"   Provider {i}: {provider.stats}")
+    return metrics
+
+async def sweep(cfgs: List[TestConfig]) -> List[Dict[str, Any]]:
+    """Run several independent scenarios concurrently"""
+    return await asyncio.gather(*(run_scenario(cfg) for cfg in cfgs))
+
+async def balanced_test(cfg: TestConfig = TestConfig()):
+    """Run a balanced test with matching price ranges"""
+    logger.info("🧪 Running balanced test simulation...")
     
-    logger.info("🛒 Buyer Stats:")
-    for i, buyer in enumerate(buyers):
-        logger.info(f"   Buyer {i}: {buyer.stats}")
+    metrics = await run_scenario(cfg)
     
     logger.info("✅ Balanced test completed successfully!")
     
     return metrics
 
 if __name__ == "__main__":
-    result = asyncio.run(balanced_test())
+    # A single runner keeps one warm event loop for every scenario of the invocation
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        if "--sweep" in sys.argv:
+            # Vary provider pricing and buyer budget around the balanced scenario
+            cfgs = [
+                TestConfig(base_price=price, budget=budget)
+                for price in (0.3, 0.4, 0.5, 0.6)
+                for budget in (20.0, 30.0)
+            ]
+            if "--serial" in sys.argv:
+                # One scenario at a time, reusing the same loop
+                results = [runner.run(run_scenario(cfg)) for cfg in cfgs]
+            else:
+                results = runner.run(sweep(cfgs))
+            for cfg, result in zip(cfgs, results):
+                logger.info(f"📈 price ${cfg.base_price:.2f}, budget ${cfg.budget:.0f}/h: "
+                            f"{result['requests']['success_rate']:.1f}% success")
+        else:
+            result = runner.run(balanced_test())
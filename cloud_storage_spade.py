@@ -5,21 +5,73 @@ and reputation system with Monte Carlo metrics.
 """
 
 import asyncio
-import random
+import copy
+import heapq
+import itertools
 import time
 import json
 import logging
-import statistics
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from functools import lru_cache
+from dataclasses import dataclass, fields
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None  # numba not installed - use the vectorized NumPy scorer
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None  # pyarrow not installed - Monte Carlo results are only written as JSON Lines
+
+# Prefer uvloop's libuv-based event loop when it is available
+loop_factory = None  # asyncio.Runner falls back to the default loop
+if sys.platform != "win32":
+    try:
+        import uvloop
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        pass  # uvloop not installed (or failed to build) - keep the stdlib loop
+
 import spade
 from spade.agent import Agent
 from spade.behaviour import CyclicBehaviour, OneShotBehaviour, PeriodicBehaviour
 from spade.message import Message
 from spade.template import Template
 
+# Prefer orjson's C codec for message bodies; fall back to the stdlib json module.
+# Dataclasses are encoded straight from their fields, without a deep-copied dict.
+try:
+    import orjson
+    
+    def _encode(obj) -> str:
+        return orjson.dumps(obj).decode()  # Serializes dataclasses natively
+    
+    _decode = orjson.loads  # orjson.JSONDecodeError subclasses json.JSONDecodeError
+    
+    def _encode_line(obj) -> bytes:
+        # Result summaries carry numpy scalars from the vectorised statistics
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    def _dataclass_fields(obj) -> Dict:
+        return {f.name: getattr(obj, f.name) for f in fields(obj)}
+    
+    def _encode(obj) -> str:
+        return json.dumps(obj, default=_dataclass_fields)
+    
+    _decode = json.loads
+    
+    def _encode_line(obj) -> bytes:
+        return (_encode(obj) + "\n").encode()
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, 
@@ -27,7 +79,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger("CloudStorageSpade")
 
-@dataclass
+# Process-wide sequence for request and contract ids (unique, no clock or RNG call)
+_id_counter = itertools.count()
+
+@dataclass(slots=True)
 class StorageRequest:
     """Storage request data structure"""
     buyer_id: str
@@ -37,7 +92,7 @@ class StorageRequest:
     timestamp: float
     request_id: str
 
-@dataclass
+@dataclass(slots=True)
 class StorageContract:
     """Storage contract data structure"""
     contract_id: str
@@ -50,7 +105,7 @@ class StorageContract:
     end_time: float
     status: str  # 'active', 'completed', 'failed'
 
-@dataclass
+@dataclass(slots=True)
 class ProviderInfo:
     """Provider information for the network"""
     agent_id: str
@@ -62,6 +117,122 @@ class ProviderInfo:
     success_count: int
     failure_count: int
 
+def _pick_best_numpy(avail, price, rep, seen, space_gb, max_price, now) -> int:
+    """Index of the best scoring eligible provider, or -1"""
+    mask = (avail >= space_gb) & (price <= max_price) & (rep >= 2.0) & (now - seen < 60)
+    if not mask.any():
+        return -1
+    # Higher reputation and lower price = higher score, reputation weighted more
+    scores = (rep / 10.0) * 0.7 + (1.0 - price / max_price) * 0.3
+    return int(np.argmax(np.where(mask, scores, -np.inf)))
+
+def _pick_best_loop(avail, price, rep, seen, space_gb, max_price, now) -> int:
+    """Single-pass filter, score and argmax (compiled with numba)"""
+    best = -1
+    best_score = 0.0
+    for i in range(avail.shape[0]):
+        if avail[i] >= space_gb and price[i] <= max_price and rep[i] >= 2.0 and now - seen[i] < 60:
+            score = (rep[i] / 10.0) * 0.7 + (1.0 - price[i] / max_price) * 0.3
+            if best < 0 or score > best_score:  # Index guard instead of an -inf sentinel
+                best = i
+                best_score = score
+    return best
+
+# fastmath without 'nnan'/'ninf': a zero max_price still yields NaN/inf scores
+_FASTMATH_FLAGS = {'reassoc', 'contract', 'arcp'}
+pick_best = njit(cache=True, fastmath=_FASTMATH_FLAGS)(_pick_best_loop) if njit is not None else _pick_best_numpy
+
+class ProviderTable:
+    """Struct-of-arrays view of the provider fields used for selection"""
+    
+    def __init__(self, capacity: int = 16):
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}  # provider_id -> row index
+        self.avail = np.zeros(capacity)
+        self.price = np.zeros(capacity)
+        self.rep = np.zeros(capacity)
+        self.seen = np.zeros(capacity)
+    
+    def sync(self, provider: ProviderInfo):
+        """Insert or refresh the row of a provider"""
+        row = self.rows.get(provider.agent_id)
+        if row is None:
+            row = len(self.ids)
+            if row == len(self.avail):
+                self._grow()
+            self.rows[provider.agent_id] = row
+            self.ids.append(provider.agent_id)
+        self.avail[row] = provider.available_space_gb
+        self.price[row] = provider.price_per_gb_hour
+        self.rep[row] = provider.reputation
+        self.seen[row] = provider.last_seen
+    
+    def remove(self, provider_id: str):
+        """Remove a provider by moving the last row into its slot"""
+        row = self.rows.pop(provider_id)
+        last = len(self.ids) - 1
+        last_id = self.ids.pop()
+        if row != last:
+            self.ids[row] = last_id
+            self.rows[last_id] = row
+            for column in (self.avail, self.price, self.rep, self.seen):
+                column[row] = column[last]
+    
+    def pick(self, space_gb: int, max_price: float, now: float) -> Optional[str]:
+        """Return the best scoring eligible provider id, or None"""
+        n = len(self.ids)
+        if n == 0:
+            return None
+        row = pick_best(self.avail[:n], self.price[:n], self.rep[:n], self.seen[:n],
+                        float(space_gb), float(max_price), now)
+        return self.ids[row] if row >= 0 else None
+    
+    def _grow(self):
+        capacity = 2 * len(self.avail)
+        for name in ('avail', 'price', 'rep', 'seen'):
+            column = np.zeros(capacity)
+            column[:len(self.ids)] = getattr(self, name)
+            setattr(self, name, column)
+
+def _mean_std_numpy(a):
+    """Mean and sample standard deviation of a non-empty array"""
+    return float(a.mean()), float(a.std(ddof=1)) if a.shape[0] > 1 else 0.0
+
+def _mean_std_loop(a):
+    """Single-pass Welford mean and sample standard deviation (compiled with numba)"""
+    n = a.shape[0]
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        d = a[i] - mean
+        mean += d / (i + 1)
+        m2 += d * (a[i] - mean)
+    return mean, (m2 / (n - 1)) ** 0.5 if n > 1 else 0.0
+
+mean_std = njit(cache=True)(_mean_std_loop) if njit is not None else _mean_std_numpy
+
+class SampleRing:
+    """Fixed-size ring buffer of float samples; keeps the most recent `capacity` values"""
+    
+    def __init__(self, capacity: int = 65536):
+        self.buffer = np.empty(capacity, dtype=np.float64)
+        self.index = 0
+        self.full = False
+    
+    def add(self, value: float):
+        self.buffer[self.index] = value
+        self.index += 1
+        if self.index == len(self.buffer):
+            self.index = 0
+            self.full = True
+    
+    def values(self) -> np.ndarray:
+        return self.buffer if self.full else self.buffer[:self.index]
+    
+    def mean_std(self) -> Tuple[float, float]:
+        values = self.values()
+        return mean_std(values) if len(values) else (0, 0)
+
 class SimulationMetrics:
     """Collects and manages simulation metrics"""
     
@@ -72,30 +243,44 @@ class SimulationMetrics:
         self.requests_sent = 0
         self.requests_successful = 0
         self.requests_failed = 0
-        self.response_times = []
-        self.contract_durations = []
-        self.provider_utilizations = []
+        self.response_times = SampleRing()
+        self.contract_durations = SampleRing()
+        self.provider_utilizations = SampleRing()
         self.network_corruptions = 0
         self.provider_failures = 0
-        self.start_time = time.time()
+        self.start_time = time.monotonic()  # Only used for the elapsed duration
+        self.request_target = None
+        self.target_event = None
+    
+    def set_request_target(self, target: int, event: asyncio.Event):
+        """Set `event` once `target` requests have been answered"""
+        self.request_target = target
+        self.target_event = event
+    
+    def _check_target(self):
+        if (self.target_event is not None and
+                self.requests_successful + self.requests_failed >= self.request_target):
+            self.target_event.set()
         
     def add_response_time(self, response_time: float):
-        self.response_times.append(response_time)
+        self.response_times.add(response_time)
     
     def add_successful_request(self):
         self.requests_successful += 1
+        self._check_target()
     
     def add_failed_request(self):
         self.requests_failed += 1
+        self._check_target()
     
     def add_sent_request(self):
         self.requests_sent += 1
     
     def add_contract_duration(self, duration: float):
-        self.contract_durations.append(duration)
+        self.contract_durations.add(duration)
     
     def add_provider_utilization(self, utilization: float):
-        self.provider_utilizations.append(utilization)
+        self.provider_utilizations.add(utilization)
     
     def add_network_corruption(self):
         self.network_corruptions += 1
@@ -105,7 +290,8 @@ class SimulationMetrics:
     
     def get_summary(self) -> Dict:
         """Returns summary of collected metrics"""
-        total_time = time.time() - self.start_time
+        total_time = time.monotonic() - self.start_time
+        avg_response_time, std_response_time = self.response_times.mean_std()
         
         return {
             'total_requests': self.requests_sent,
@@ -113,10 +299,10 @@ class SimulationMetrics:
             'failed_requests': self.requests_failed,
             'success_rate': (self.requests_successful / max(self.requests_sent, 1)) * 100,
             'failure_rate': (self.requests_failed / max(self.requests_sent, 1)) * 100,
-            'avg_response_time': statistics.mean(self.response_times) if self.response_times else 0,
-            'std_response_time': statistics.stdev(self.response_times) if len(self.response_times) > 1 else 0,
-            'avg_contract_duration': statistics.mean(self.contract_durations) if self.contract_durations else 0,
-            'avg_provider_utilization': statistics.mean(self.provider_utilizations) if self.provider_utilizations else 0,
+            'avg_response_time': avg_response_time,
+            'std_response_time': std_response_time,
+            'avg_contract_duration': self.contract_durations.mean_std()[0],
+            'avg_provider_utilization': self.provider_utilizations.mean_std()[0],
             'network_corruptions': self.network_corruptions,
             'provider_failures': self.provider_failures,
             'simulation_duration': total_time
@@ -125,14 +311,116 @@ class SimulationMetrics:
 # Global metrics instance
 global_metrics = SimulationMetrics()
 
+class UniformBuffer:
+    """Circular buffer of uniform draws, refilled with one numpy call when exhausted"""
+    
+    __slots__ = ('rng', 'low', 'high', 'size', 'values', 'pos')
+    
+    def __init__(self, rng: np.random.Generator, low: float = 0.0, high: float = 1.0, size: int = 1024):
+        self.rng = rng
+        self.low = low
+        self.high = high
+        self.size = size
+        self.values: List[float] = []
+        self.pos = size  # Filled lazily on the first draw
+    
+    def next(self) -> float:
+        if self.pos == self.size:
+            self.values = self.rng.uniform(self.low, self.high, self.size).tolist()
+            self.pos = 0
+        value = self.values[self.pos]
+        self.pos += 1
+        return value
+
+class SimulatedClock:
+    """Clock for modeled delays: waits them out in real time, or only advances a virtual offset"""
+    
+    def __init__(self, virtual: bool = False):
+        self.virtual = virtual
+        self.offset = 0.0  # Modeled delay accumulated while in virtual mode
+    
+    def now(self) -> float:
+        return time.monotonic() + self.offset  # Only used for intervals (response times)
+    
+    async def advance(self, delay: float):
+        if self.virtual:
+            self.offset += delay
+            await asyncio.sleep(0)  # Still yield so other behaviours get a turn
+        else:
+            await asyncio.sleep(delay)
+
+# Shared simulation clock; set clock.virtual = True to model latency without waiting for it
+clock = SimulatedClock()
+
+class ClockCache:
+    """Monotonic time refreshed by a background task, read by per-message handlers"""
+    
+    def __init__(self):
+        self.now = time.monotonic()
+    
+    async def run(self, interval: float = 0.05):
+        while True:
+            self.now = time.monotonic()
+            await asyncio.sleep(interval)
+
+# Network-side clock for liveness and contract start/end times; ticked by run_single_simulation
+clock_cache = ClockCache()
+
+@lru_cache(maxsize=1024)
+def encode_status(provider_id: str, available_space_gb: int, active_contracts: int,
+                  reputation: float, utilization: float) -> str:
+    """Status update body; an idle provider repeats the same values every tick"""
+    return _encode({
+        'provider_id': provider_id,
+        'available_space_gb': available_space_gb,
+        'active_contracts': active_contracts,
+        'reputation': reputation,
+        'utilization': utilization
+    })
+
+class InProcessBus:
+    """In-memory transport: messages are handed straight to the recipient agent's
+    behaviour queues instead of travelling over XMPP"""
+    
+    def __init__(self):
+        self.agents: Dict[str, Agent] = {}  # jid -> agent
+    
+    def register(self, agent: Agent):
+        self.agents[str(agent.jid)] = agent
+    
+    def deliver(self, sender: Agent, msg: Message):
+        if msg.sender is None:
+            msg.sender = str(sender.jid)
+        recipient = self.agents.get(str(msg.to))
+        if recipient is None:
+            logger.warning("Agent %s not registered on the in-process bus", msg.to)
+            return
+        recipient.dispatch(msg)  # Routes to the behaviours whose template matches
+
+# Message transport: BUS=inprocess skips XMPP for agent-to-agent messages
+TRANSPORT = os.environ.get("BUS", "xmpp")
+bus = InProcessBus() if TRANSPORT == "inprocess" else None
+
+async def send_message(sender, msg: Message):
+    """Send from a behaviour (or agent) over the configured transport"""
+    if bus is not None:
+        agent = sender if isinstance(sender, Agent) else sender.agent
+        bus.deliver(agent, msg)
+    else:
+        await sender.send(msg)
+
+def message_prototype(performative: str, to: Optional[str] = None) -> Message:
+    """Message with fixed metadata, shallow-copied per send instead of rebuilt"""
+    proto = Message(to=to)
+    proto.set_metadata("performative", performative)
+    return proto
+
 class NetworkLatencyBehaviour:
     """Mixin to add network latency simulation"""
     
-    @staticmethod
-    async def simulate_network_delay(min_delay: float = 0.1, max_delay: float = 0.8):
-        """Simulates network latency"""
-        delay = random.uniform(min_delay, max_delay)
-        await asyncio.sleep(delay)
+    async def simulate_network_delay(self):
+        """Simulates network latency (0.1-0.8s, drawn from the agent's buffer)"""
+        await clock.advance(self.agent.latency_draws.next())
 
 class BuyerAgent(Agent):
     """
@@ -140,11 +428,18 @@ class BuyerAgent(Agent):
     """
     
     def __init__(self, jid: str, password: str, network_jid: str, 
-                 request_interval: Tuple[int, int] = (5, 15)):
+                 request_interval: Tuple[int, int] = (5, 15), seed=None):
         super().__init__(jid, password)
+        if bus is not None:
+            bus.register(self)
         self.network_jid = network_jid
         self.request_interval = request_interval
         self.pending_requests = {}
+        self.rng = np.random.default_rng(seed)
+        self.latency_draws = UniformBuffer(self.rng, 0.1, 0.8)
+        self.max_price_draws = UniformBuffer(self.rng, 0.1, 1.0)  # $0.1-1.0 per GB/hour
+        self.space_draws = UniformBuffer(self.rng, 1, 21)  # Truncated to 1-20 GB
+        self.duration_draws = UniformBuffer(self.rng, 0.5, 4.0)  # 0.5-4 hours
         self.completed_contracts = []
         self.stats = {
             'requests_sent': 0,
@@ -154,7 +449,9 @@ class BuyerAgent(Agent):
         }
     
     async def setup(self):
-        logger.info(f"🛒 Buyer {self.jid} starting up")
+        logger.info("🛒 Buyer %s starting up", self.jid)
+        self.jid_str = str(self.jid)  # Rendered once for message payloads
+        self.request_msg_proto = message_prototype("storage-request", self.network_jid)
         
         # Add request behavior
         request_behaviour = self.RequestStorageBehaviour()
@@ -171,17 +468,17 @@ class BuyerAgent(Agent):
         
         async def run(self):
             # Generate storage request
-            space_needed = random.randint(1, 20)  # 1-20 GB
-            duration = random.uniform(0.5, 4.0)   # 0.5-4 hours
-            max_price = random.uniform(0.1, 1.0)  # $0.1-1.0 per GB/hour
-            request_id = f"REQ-{int(time.time())}-{random.randint(1000, 9999)}"
+            space_needed = int(self.agent.space_draws.next())  # 1-20 GB
+            duration = self.agent.duration_draws.next()  # 0.5-4 hours
+            max_price = self.agent.max_price_draws.next()  # $0.1-1.0 per GB/hour
+            request_id = f"REQ-{next(_id_counter):x}"
             
             request = StorageRequest(
-                buyer_id=str(self.agent.jid),
+                buyer_id=self.agent.jid_str,
                 space_gb=space_needed,
                 duration_hours=duration,
                 max_price=max_price,
-                timestamp=time.time(),
+                timestamp=clock.now(),
                 request_id=request_id
             )
             
@@ -189,24 +486,24 @@ class BuyerAgent(Agent):
             self.agent.pending_requests[request_id] = request
             
             # Create message
-            msg = Message(to=self.agent.network_jid)
-            msg.set_metadata("performative", "storage-request")
-            msg.body = json.dumps(asdict(request))
+            msg = copy.copy(self.agent.request_msg_proto)
+            msg.body = _encode(request)
             
             # Simulate network latency
             await self.simulate_network_delay()
             
             # Send message
-            await self.send(msg)
+            await send_message(self, msg)
             
             self.agent.stats['requests_sent'] += 1
             global_metrics.add_sent_request()
             
-            logger.info(f"🛒 Buyer {self.agent.jid} requested {space_needed}GB for {duration:.1f}h at max ${max_price:.2f}/GB/h")
+            logger.info("🛒 Buyer %s requested %sGB for %.1fh at max $%.2f/GB/h", self.agent.jid, space_needed, duration, max_price)
         
         async def on_start(self):
             # Random interval between requests
-            interval = random.randint(*self.agent.request_interval)
+            low, high = self.agent.request_interval
+            interval = int(self.agent.rng.integers(low, high, endpoint=True))
             self.period = interval
     
     class HandleResponseBehaviour(CyclicBehaviour):
@@ -216,36 +513,37 @@ class BuyerAgent(Agent):
             msg = await self.receive(timeout=10)
             if msg:
                 try:
-                    response_data = json.loads(msg.body)
+                    response_data = _decode(msg.body)
                     request_id = response_data.get('request_id')
+                    agent = self.agent
+                    stats = agent.stats
                     
-                    if request_id in self.agent.pending_requests:
-                        original_request = self.agent.pending_requests[request_id]
-                        response_time = time.time() - original_request.timestamp
+                    # Look up and remove the pending request in one step
+                    original_request = agent.pending_requests.pop(request_id, None)
+                    if original_request is not None:
+                        response_time = clock.now() - original_request.timestamp
                         
                         global_metrics.add_response_time(response_time)
                         
                         if response_data.get('status') == 'success':
-                            self.agent.stats['requests_successful'] += 1
-                            self.agent.stats['total_spent'] += response_data.get('total_cost', 0)
+                            total_cost = response_data.get('total_cost', 0)
+                            stats['requests_successful'] += 1
+                            stats['total_spent'] += total_cost
                             global_metrics.add_successful_request()
                             
                             # Store contract info
                             contract = StorageContract(**response_data['contract'])
-                            self.agent.completed_contracts.append(contract)
+                            agent.completed_contracts.append(contract)
                             global_metrics.add_contract_duration(contract.duration_hours)
                             
-                            logger.info(f"✅ Buyer {self.agent.jid} request {request_id} accepted - Cost: ${response_data.get('total_cost', 0):.2f}")
+                            logger.info("✅ Buyer %s request %s accepted - Cost: $%.2f", agent.jid, request_id, total_cost)
                         else:
-                            self.agent.stats['requests_failed'] += 1
+                            stats['requests_failed'] += 1
                             global_metrics.add_failed_request()
-                            logger.info(f"❌ Buyer {self.agent.jid} request {request_id} rejected: {response_data.get('reason', 'unknown')}")
-                        
-                        # Remove from pending
-                        del self.agent.pending_requests[request_id]
+                            logger.info("❌ Buyer %s request %s rejected: %s", agent.jid, request_id, response_data.get('reason', 'unknown'))
                 
                 except json.JSONDecodeError:
-                    logger.error(f"Invalid JSON in response: {msg.body}")
+                    logger.error("Invalid JSON in response: %s", msg.body)
 
 class StorageProviderAgent(Agent):
     """
@@ -254,14 +552,21 @@ class StorageProviderAgent(Agent):
     
     def __init__(self, jid: str, password: str, network_jid: str, 
                  total_space_gb: int, price_per_gb_hour: float = 0.5, 
-                 failure_probability: float = 0.1):
+                 failure_probability: float = 0.1, seed=None):
         super().__init__(jid, password)
+        if bus is not None:
+            bus.register(self)
         self.network_jid = network_jid
         self.total_space_gb = total_space_gb
         self.available_space_gb = total_space_gb
         self.price_per_gb_hour = price_per_gb_hour
         self.failure_probability = failure_probability
         self.active_contracts = {}
+        self.expiry_heap = []  # (end_time, contract_id) min-heap of active contracts
+        self.rng = np.random.default_rng(seed)
+        self.latency_draws = UniformBuffer(self.rng, 0.1, 0.8)
+        self.decision_delay_draws = UniformBuffer(self.rng, 0.1, 0.3)
+        self.failure_rolls = UniformBuffer(self.rng)
         self.completed_contracts = []
         self.reputation = 5.0  # Initial reputation
         self.stats = {
@@ -271,10 +576,13 @@ class StorageProviderAgent(Agent):
             'total_earnings': 0.0,
             'uptime': 0.0
         }
-        self.start_time = time.time()
+        self.start_time = time.monotonic()  # Only used for uptime
     
     async def setup(self):
-        logger.info(f"💾 Provider {self.jid} starting with {self.total_space_gb}GB at ${self.price_per_gb_hour:.2f}/GB/h")
+        logger.info("💾 Provider %s starting with %sGB at $%.2f/GB/h", self.jid, self.total_space_gb, self.price_per_gb_hour)
+        self.jid_str = str(self.jid)  # Rendered once for message payloads
+        self.status_msg_proto = message_prototype("status-update", self.network_jid)
+        self.reply_msg_proto = message_prototype("allocation-response")
         
         # Register with network
         await self.register_with_network()
@@ -296,22 +604,22 @@ class StorageProviderAgent(Agent):
     async def register_with_network(self):
         """Register provider with the network"""
         provider_info = ProviderInfo(
-            agent_id=str(self.jid),
+            agent_id=self.jid_str,
             total_space_gb=self.total_space_gb,
             available_space_gb=self.available_space_gb,
             reputation=self.reputation,
             price_per_gb_hour=self.price_per_gb_hour,
-            last_seen=time.time(),
+            last_seen=time.monotonic(),
             success_count=0,
             failure_count=0
         )
         
         msg = Message(to=self.network_jid)
         msg.set_metadata("performative", "provider-registration")
-        msg.body = json.dumps(asdict(provider_info))
+        msg.body = _encode(provider_info)
         
-        await self.send(msg)
-        logger.info(f"📋 Provider {self.jid} registered with network")
+        await send_message(self, msg)
+        logger.info("📋 Provider %s registered with network", self.jid)
     
     class HandleAllocationBehaviour(CyclicBehaviour, NetworkLatencyBehaviour):
         """Handles allocation requests from the network"""
@@ -320,59 +628,62 @@ class StorageProviderAgent(Agent):
             msg = await self.receive(timeout=10)
             if msg:
                 try:
-                    request_data = json.loads(msg.body)
+                    request_data = _decode(msg.body)
                     contract_data = request_data['contract']
+                    agent = self.agent
+                    stats = agent.stats
                     
-                    self.agent.stats['requests_received'] += 1
+                    stats['requests_received'] += 1
                     
                     # Simulate provider decision-making delay
-                    await asyncio.sleep(random.uniform(0.1, 0.3))
+                    await clock.advance(agent.decision_delay_draws.next())
                     
                     # Check if we can fulfill the request
                     space_needed = contract_data['space_gb']
                     can_allocate = (
-                        self.agent.available_space_gb >= space_needed and
-                        random.random() > self.agent.failure_probability  # Simulate random failures
+                        agent.available_space_gb >= space_needed and
+                        agent.failure_rolls.next() > agent.failure_probability  # Simulate random failures
                     )
                     
                     response = {
                         'contract_id': contract_data['contract_id'],
-                        'provider_id': str(self.agent.jid),
+                        'provider_id': agent.jid_str,
                         'request_id': request_data['request_id']
                     }
                     
                     if can_allocate:
                         # Accept the contract
                         contract = StorageContract(**contract_data)
-                        self.agent.active_contracts[contract.contract_id] = contract
-                        self.agent.available_space_gb -= space_needed
-                        self.agent.stats['requests_accepted'] += 1
-                        self.agent.stats['total_earnings'] += contract.price
+                        agent.active_contracts[contract.contract_id] = contract
+                        heapq.heappush(agent.expiry_heap, (contract.end_time, contract.contract_id))
+                        agent.available_space_gb -= space_needed
+                        stats['requests_accepted'] += 1
+                        stats['total_earnings'] += contract.price
                         
                         response['status'] = 'accepted'
                         response['estimated_completion'] = contract.end_time
                         
-                        logger.info(f"🟢 Provider {self.agent.jid} accepted contract {contract.contract_id} ({space_needed}GB)")
+                        logger.info("🟢 Provider %s accepted contract %s (%sGB)", agent.jid, contract.contract_id, space_needed)
                     else:
                         # Reject the contract
-                        self.agent.stats['requests_rejected'] += 1
+                        stats['requests_rejected'] += 1
                         response['status'] = 'rejected'
-                        response['reason'] = 'insufficient_space' if self.agent.available_space_gb < space_needed else 'provider_failure'
+                        response['reason'] = 'insufficient_space' if agent.available_space_gb < space_needed else 'provider_failure'
                         
                         global_metrics.add_provider_failure()
-                        logger.info(f"🔴 Provider {self.agent.jid} rejected contract {contract_data['contract_id']}")
+                        logger.info("🔴 Provider %s rejected contract %s", agent.jid, contract_data['contract_id'])
                     
                     # Send response back to network
-                    reply = Message(to=str(msg.sender))
-                    reply.set_metadata("performative", "allocation-response")
-                    reply.body = json.dumps(response)
+                    reply = copy.copy(agent.reply_msg_proto)
+                    reply.to = str(msg.sender)
+                    reply.body = _encode(response)
                     
                     # Simulate network latency
                     await self.simulate_network_delay()
-                    await self.send(reply)
+                    await send_message(self, reply)
                     
                 except json.JSONDecodeError:
-                    logger.error(f"Invalid JSON in allocation request: {msg.body}")
+                    logger.error("Invalid JSON in allocation request: %s", msg.body)
     
     class StatusUpdateBehaviour(PeriodicBehaviour):
         """Periodically updates status with the network"""
@@ -383,22 +694,14 @@ class StorageProviderAgent(Agent):
             global_metrics.add_provider_utilization(utilization)
             
             # Update uptime
-            self.agent.stats['uptime'] = time.time() - self.agent.start_time
+            self.agent.stats['uptime'] = time.monotonic() - self.agent.start_time
             
             # Send status update to network
-            status_update = {
-                'provider_id': str(self.agent.jid),
-                'available_space_gb': self.agent.available_space_gb,
-                'active_contracts': len(self.agent.active_contracts),
-                'reputation': self.agent.reputation,
-                'utilization': utilization
-            }
-            
-            msg = Message(to=self.agent.network_jid)
-            msg.set_metadata("performative", "status-update")
-            msg.body = json.dumps(status_update)
+            msg = copy.copy(self.agent.status_msg_proto)
+            msg.body = encode_status(self.agent.jid_str, self.agent.available_space_gb,
+                                     len(self.agent.active_contracts), self.agent.reputation, utilization)
             
-            await self.send(msg)
+            await send_message(self, msg)
         
         async def on_start(self):
             self.period = 10  # Update every 10 seconds
@@ -407,22 +710,30 @@ class StorageProviderAgent(Agent):
         """Manages active contracts and releases space when contracts expire"""
         
         async def run(self):
-            current_time = time.time()
-            completed_contracts = []
+            current_time = time.monotonic()  # Same time base as the network's contract end_time
+            expiry_heap = self.agent.expiry_heap
             
-            for contract_id, contract in self.agent.active_contracts.items():
-                if current_time >= contract.end_time:
-                    # Contract completed
-                    self.agent.available_space_gb += contract.space_gb
-                    contract.status = 'completed'
-                    self.agent.completed_contracts.append(contract)
-                    completed_contracts.append(contract_id)
-                    
-                    logger.info(f"📦 Provider {self.agent.jid} completed contract {contract_id} - Released {contract.space_gb}GB")
+            # Only the earliest-ending contracts can have expired; a tick with
+            # nothing due is a single peek instead of a scan of every contract
+            while expiry_heap and expiry_heap[0][0] <= current_time:
+                _, contract_id = heapq.heappop(expiry_heap)
+                contract = self.agent.active_contracts.pop(contract_id, None)
+                if contract is None:
+                    continue  # Tombstone: contract already left active_contracts
+                
+                # Contract completed
+                self.agent.available_space_gb += contract.space_gb
+                contract.status = 'completed'
+                self.agent.completed_contracts.append(contract)
+                
+                logger.info("📦 Provider %s completed contract %s - Released %sGB", self.agent.jid, contract_id, contract.space_gb)
             
-            # Remove completed contracts
-            for contract_id in completed_contracts:
-                del self.agent.active_contracts[contract_id]
+            # Wake up when the next contract is due, but never later than the
+            # regular 5s check so contracts accepted meanwhile are not missed
+            if expiry_heap:
+                self.period = min(max(expiry_heap[0][0] - current_time, 1), 5)
+            else:
+                self.period = 5
         
         async def on_start(self):
             self.period = 5  # Check every 5 seconds
@@ -433,12 +744,19 @@ class IntermediaryNetworkAgent(Agent):
     Implements reputation system and handles contract negotiations
     """
     
-    def __init__(self, jid: str, password: str, corruption_probability: float = 0.05):
+    def __init__(self, jid: str, password: str, corruption_probability: float = 0.05, seed=None):
         super().__init__(jid, password)
+        if bus is not None:
+            bus.register(self)
         self.providers = {}  # provider_id -> ProviderInfo
+        self.provider_table = ProviderTable()  # Selection columns mirrored from self.providers
+        self.liveness_heap = []  # (last_seen, provider_id) min-heap; stale entries are skipped
         self.pending_requests = {}  # request_id -> (buyer_jid, request_data)
         self.active_contracts = {}  # contract_id -> StorageContract
         self.corruption_probability = corruption_probability
+        self.rng = np.random.default_rng(seed)
+        self.latency_draws = UniformBuffer(self.rng, 0.1, 0.8)
+        self.corruption_rolls = UniformBuffer(self.rng)
         self.stats = {
             'requests_processed': 0,
             'successful_allocations': 0,
@@ -447,133 +765,139 @@ class IntermediaryNetworkAgent(Agent):
             'corrupted_contracts': 0
         }
     
+    def add_provider(self, provider_info: ProviderInfo):
+        """Store a provider and mirror it into the selection table"""
+        self.providers[provider_info.agent_id] = provider_info
+        self.provider_table.sync(provider_info)
+        heapq.heappush(self.liveness_heap, (provider_info.last_seen, provider_info.agent_id))
+    
+    def remove_provider(self, provider_id: str):
+        """Drop a provider and its selection table row"""
+        del self.providers[provider_id]
+        self.provider_table.remove(provider_id)
+    
     async def setup(self):
-        logger.info(f"🏢 Network {self.jid} starting up")
-        
-        # Handle provider registrations
-        registration_template = Template()
-        registration_template.set_metadata("performative", "provider-registration")
-        registration_behaviour = self.HandleRegistrationBehaviour()
-        self.add_behaviour(registration_behaviour, registration_template)
+        logger.info("🏢 Network %s starting up", self.jid)
+        self.allocation_msg_proto = message_prototype("allocation-request")
+        self.response_msg_proto = message_prototype("storage-response")
         
-        # Handle storage requests
-        request_template = Template()
-        request_template.set_metadata("performative", "storage-request")
-        request_behaviour = self.HandleStorageRequestBehaviour()
-        self.add_behaviour(request_behaviour, request_template)
-        
-        # Handle allocation responses
-        allocation_template = Template()
-        allocation_template.set_metadata("performative", "allocation-response")
-        allocation_behaviour = self.HandleAllocationResponseBehaviour()
-        self.add_behaviour(allocation_behaviour, allocation_template)
-        
-        # Handle status updates
-        status_template = Template()
-        status_template.set_metadata("performative", "status-update")
-        status_behaviour = self.HandleStatusUpdateBehaviour()
-        self.add_behaviour(status_behaviour, status_template)
+        # Handle registrations, storage requests, allocation responses and status updates
+        self.add_behaviour(self.MessageDispatchBehaviour())
         
         # Periodic provider cleanup
         cleanup_behaviour = self.ProviderCleanupBehaviour()
         self.add_behaviour(cleanup_behaviour)
     
-    class HandleRegistrationBehaviour(CyclicBehaviour):
-        """Handles provider registration requests"""
+    class MessageDispatchBehaviour(CyclicBehaviour, NetworkLatencyBehaviour):
+        """Single receive loop that routes every network message by performative"""
         
-        async def run(self):
-            msg = await self.receive(timeout=10)
-            if msg:
-                try:
-                    provider_info = ProviderInfo(**json.loads(msg.body))
-                    self.agent.providers[provider_info.agent_id] = provider_info
-                    self.agent.stats['provider_count'] = len(self.agent.providers)
-                    
-                    logger.info(f"📋 Network registered provider {provider_info.agent_id} with {provider_info.total_space_gb}GB")
-                    
-                except json.JSONDecodeError:
-                    logger.error(f"Invalid JSON in registration: {msg.body}")
-    
-    class HandleStorageRequestBehaviour(CyclicBehaviour, NetworkLatencyBehaviour):
-        """Handles storage requests from buyers"""
+        async def on_start(self):
+            self.handlers = {
+                "provider-registration": self.handle_registration,
+                "storage-request": self.handle_storage_request,
+                "allocation-response": self.handle_allocation_response,
+                "status-update": self.handle_status_update
+            }
+            # Handlers that wait out a simulated network delay run as their own
+            # tasks so registrations and status updates never queue behind them
+            self.delayed_handlers = {self.handle_storage_request, self.handle_allocation_response}
+            self.handler_tasks = set()  # Strong references until each task finishes
         
         async def run(self):
+            # Wait for the first message (SPADE treats timeout=None as a non-blocking
+            # poll, so keep a long wait), then drain what is already queued without
+            # going back through the behaviour scheduler for each message
             msg = await self.receive(timeout=10)
-            if msg:
-                try:
-                    request_data = json.loads(msg.body)
-                    request = StorageRequest(**request_data)
+            batch = 0
+            while msg:
+                handler = self.handlers.get(msg.get_metadata("performative"))
+                if handler in self.delayed_handlers:
+                    task = asyncio.create_task(handler(msg))
+                    self.handler_tasks.add(task)
+                    task.add_done_callback(self.handler_tasks.discard)
+                elif handler:
+                    await handler(msg)
+                batch += 1
+                if batch == 64:  # Let other behaviours run between large batches
+                    break
+                msg = await self.receive()
+        
+        async def on_end(self):
+            for task in self.handler_tasks:
+                task.cancel()
+        
+        async def handle_registration(self, msg: Message):
+            """Handles provider registration requests"""
+            try:
+                provider_info = ProviderInfo(**_decode(msg.body))
+                provider_info.last_seen = clock_cache.now  # Liveness is tracked on the network's clock
+                self.agent.add_provider(provider_info)
+                self.agent.stats['provider_count'] = len(self.agent.providers)
+                
+                logger.info("📋 Network registered provider %s with %sGB", provider_info.agent_id, provider_info.total_space_gb)
+                
+            except json.JSONDecodeError:
+                logger.error("Invalid JSON in registration: %s", msg.body)
+        
+        async def handle_storage_request(self, msg: Message):
+            """Handles storage requests from buyers"""
+            try:
+                request_data = _decode(msg.body)
+                request = StorageRequest(**request_data)
+                
+                self.agent.stats['requests_processed'] += 1
+                self.agent.pending_requests[request.request_id] = (str(msg.sender), request)
+                
+                logger.info("🏢 Network received request %s from %s", request.request_id, request.buyer_id)
+                
+                # Find suitable provider
+                now = clock_cache.now
+                selected_provider = self.select_provider(request, now)
+                
+                if selected_provider:
+                    # Create contract
+                    contract_id = f"CONT-{next(_id_counter):x}"
+                    total_cost = request.space_gb * request.duration_hours * selected_provider.price_per_gb_hour
                     
-                    self.agent.stats['requests_processed'] += 1
-                    self.agent.pending_requests[request.request_id] = (str(msg.sender), request)
+                    contract = StorageContract(
+                        contract_id=contract_id,
+                        buyer_id=request.buyer_id,
+                        provider_id=selected_provider.agent_id,
+                        space_gb=request.space_gb,
+                        duration_hours=request.duration_hours,
+                        price=total_cost,
+                        start_time=now,
+                        end_time=now + (request.duration_hours * 3600),
+                        status='pending'
+                    )
                     
-                    logger.info(f"🏢 Network received request {request.request_id} from {request.buyer_id}")
+                    # Send allocation request to provider
+                    allocation_msg = copy.copy(self.agent.allocation_msg_proto)
+                    allocation_msg.to = selected_provider.agent_id
+                    allocation_msg.body = _encode({
+                        'request_id': request.request_id,
+                        'contract': contract
+                    })
                     
-                    # Find suitable provider
-                    selected_provider = self.select_provider(request)
+                    # Simulate network latency
+                    await self.simulate_network_delay()
+                    await send_message(self, allocation_msg)
                     
-                    if selected_provider:
-                        # Create contract
-                        contract_id = f"CONT-{int(time.time())}-{random.randint(1000, 9999)}"
-                        total_cost = request.space_gb * request.duration_hours * selected_provider.price_per_gb_hour
-                        
-                        contract = StorageContract(
-                            contract_id=contract_id,
-                            buyer_id=request.buyer_id,
-                            provider_id=selected_provider.agent_id,
-                            space_gb=request.space_gb,
-                            duration_hours=request.duration_hours,
-                            price=total_cost,
-                            start_time=time.time(),
-                            end_time=time.time() + (request.duration_hours * 3600),
-                            status='pending'
-                        )
-                        
-                        # Send allocation request to provider
-                        allocation_msg = Message(to=selected_provider.agent_id)
-                        allocation_msg.set_metadata("performative", "allocation-request")
-                        allocation_msg.body = json.dumps({
-                            'request_id': request.request_id,
-                            'contract': asdict(contract)
-                        })
-                        
-                        # Simulate network latency
-                        await self.simulate_network_delay()
-                        await self.send(allocation_msg)
-                        
-                        logger.info(f"🏢 Network forwarded request {request.request_id} to provider {selected_provider.agent_id}")
-                    else:
-                        # No suitable provider found
-                        await self.send_failure_response(str(msg.sender), request.request_id, "no_suitable_provider")
-                        self.agent.stats['failed_allocations'] += 1
-                
-                except json.JSONDecodeError:
-                    logger.error(f"Invalid JSON in storage request: {msg.body}")
+                    logger.info("🏢 Network forwarded request %s to provider %s", request.request_id, selected_provider.agent_id)
+                else:
+                    # No suitable provider found
+                    await self.send_failure_response(str(msg.sender), request.request_id, "no_suitable_provider")
+                    self.agent.stats['failed_allocations'] += 1
+            
+            except json.JSONDecodeError:
+                logger.error("Invalid JSON in storage request: %s", msg.body)
         
-        def select_provider(self, request: StorageRequest) -> Optional[ProviderInfo]:
+        def select_provider(self, request: StorageRequest, now: float) -> Optional[ProviderInfo]:
             """Select best provider based on reputation, capacity, and price"""
-            suitable_providers = []
-            
-            for provider in self.agent.providers.values():
-                # Check if provider meets requirements
-                if (provider.available_space_gb >= request.space_gb and
-                    provider.price_per_gb_hour <= request.max_price and
-                    provider.reputation >= 2.0 and  # Minimum reputation threshold
-                    time.time() - provider.last_seen < 60):  # Provider is active
-                    suitable_providers.append(provider)
-            
-            if not suitable_providers:
-                return None
-            
-            # Select provider based on weighted reputation and price
-            def provider_score(p: ProviderInfo) -> float:
-                # Higher reputation and lower price = higher score
-                reputation_score = p.reputation / 10.0  # Normalize to 0-1
-                price_score = 1.0 - (p.price_per_gb_hour / request.max_price)  # Normalize to 0-1
-                return (reputation_score * 0.7) + (price_score * 0.3)  # Weight reputation more
-            
-            suitable_providers.sort(key=provider_score, reverse=True)
-            return suitable_providers[0]
+            # Filter on capacity, price, minimum reputation and liveness, then
+            # score by weighted reputation and price over the whole table at once
+            provider_id = self.agent.provider_table.pick(request.space_gb, request.max_price, now)
+            return self.agent.providers[provider_id] if provider_id is not None else None
         
         async def send_failure_response(self, buyer_jid: str, request_id: str, reason: str):
             """Send failure response to buyer"""
@@ -583,259 +907,433 @@ class IntermediaryNetworkAgent(Agent):
                 'reason': reason
             }
             
-            msg = Message(to=buyer_jid)
-            msg.set_metadata("performative", "storage-response")
-            msg.body = json.dumps(response)
+            msg = copy.copy(self.agent.response_msg_proto)
+            msg.to = buyer_jid
+            msg.body = _encode(response)
             
-            await self.send(msg)
-            logger.info(f"🏢 Network sent failure response for request {request_id}: {reason}")
-    
-    class HandleAllocationResponseBehaviour(CyclicBehaviour, NetworkLatencyBehaviour):
-        """Handles responses from providers"""
+            await send_message(self, msg)
+            logger.info("🏢 Network sent failure response for request %s: %s", request_id, reason)
         
-        async def run(self):
-            msg = await self.receive(timeout=10)
-            if msg:
-                try:
-                    response_data = json.loads(msg.body)
-                    request_id = response_data['request_id']
-                    contract_id = response_data['contract_id']
-                    provider_id = response_data['provider_id']
+        async def handle_allocation_response(self, msg: Message):
+            """Handles responses from providers"""
+            try:
+                response_data = _decode(msg.body)
+                request_id = response_data['request_id']
+                contract_id = response_data['contract_id']
+                provider_id = response_data['provider_id']
+                agent = self.agent
+                stats = agent.stats
+                providers = agent.providers
+                
+                # Look up and remove the pending request in one step
+                pending = agent.pending_requests.pop(request_id, None)
+                if pending is not None:
+                    buyer_jid, original_request = pending
                     
-                    if request_id in self.agent.pending_requests:
-                        buyer_jid, original_request = self.agent.pending_requests[request_id]
-                        
-                        # Update provider reputation
-                        if provider_id in self.agent.providers:
-                            provider = self.agent.providers[provider_id]
-                            if response_data['status'] == 'accepted':
-                                provider.success_count += 1
-                                provider.reputation = min(provider.reputation * 1.05, 10.0)
-                            else:
-                                provider.failure_count += 1
-                                provider.reputation = max(provider.reputation * 0.95, 0.5)
-                        
-                        # Prepare response to buyer
+                    # Update provider reputation
+                    provider = providers.get(provider_id)
+                    if provider is not None:
                         if response_data['status'] == 'accepted':
-                            self.agent.stats['successful_allocations'] += 1
-                            
-                            # Simulate potential contract corruption
-                            corrupted = random.random() < self.agent.corruption_probability
-                            if corrupted:
-                                self.agent.stats['corrupted_contracts'] += 1
-                                global_metrics.add_network_corruption()
-                                response_status = 'failure'
-                                response_reason = 'network_corruption'
-                                logger.warning(f"⚠️ Network corrupted contract {contract_id}!")
-                            else:
-                                response_status = 'success'
-                                response_reason = None
-                            
-                            buyer_response = {
-                                'request_id': request_id,
-                                'status': response_status,
-                                'contract': {
-                                    'contract_id': contract_id,
-                                    'buyer_id': original_request.buyer_id,
-                                    'provider_id': provider_id,
-                                    'space_gb': original_request.space_gb,
-                                    'duration_hours': original_request.duration_hours,
-                                    'price': original_request.space_gb * original_request.duration_hours * self.agent.providers[provider_id].price_per_gb_hour,
-                                    'start_time': time.time(),
-                                    'end_time': time.time() + (original_request.duration_hours * 3600),
-                                    'status': 'active'
-                                },
-                                'total_cost': original_request.space_gb * original_request.duration_hours * self.agent.providers[provider_id].price_per_gb_hour
-                            }
-                            
-                            if corrupted:
-                                buyer_response['reason'] = response_reason
+                            provider.success_count += 1
+                            provider.reputation = min(provider.reputation * 1.05, 10.0)
                         else:
-                            self.agent.stats['failed_allocations'] += 1
-                            buyer_response = {
-                                'request_id': request_id,
-                                'status': 'failure',
-                                'reason': response_data.get('reason', 'provider_rejected')
-                            }
+                            provider.failure_count += 1
+                            provider.reputation = max(provider.reputation * 0.95, 0.5)
+                        agent.provider_table.sync(provider)
+                    
+                    # Prepare response to buyer
+                    if response_data['status'] == 'accepted':
+                        stats['successful_allocations'] += 1
                         
-                        # Send response to buyer
-                        buyer_msg = Message(to=buyer_jid)
-                        buyer_msg.set_metadata("performative", "storage-response")
-                        buyer_msg.body = json.dumps(buyer_response)
+                        # Contract terms, computed once for the response
+                        provider_price = providers[provider_id].price_per_gb_hour
+                        total_cost = original_request.space_gb * original_request.duration_hours * provider_price
+                        now = clock_cache.now
+                        end_ts = now + (original_request.duration_hours * 3600)
                         
-                        # Simulate network latency
-                        await self.simulate_network_delay()
-                        await self.send(buyer_msg)
+                        # Simulate potential contract corruption
+                        corrupted = agent.corruption_rolls.next() < agent.corruption_probability
+                        if corrupted:
+                            stats['corrupted_contracts'] += 1
+                            global_metrics.add_network_corruption()
+                            response_status = 'failure'
+                            response_reason = 'network_corruption'
+                            logger.warning("⚠️ Network corrupted contract %s!", contract_id)
+                        else:
+                            response_status = 'success'
+                            response_reason = None
                         
-                        # Remove from pending
-                        del self.agent.pending_requests[request_id]
-                
-                except json.JSONDecodeError:
-                    logger.error(f"Invalid JSON in allocation response: {msg.body}")
-    
-    class HandleStatusUpdateBehaviour(CyclicBehaviour):
-        """Handles status updates from providers"""
-        
-        async def run(self):
-            msg = await self.receive(timeout=10)
-            if msg:
-                try:
-                    status_data = json.loads(msg.body)
-                    provider_id = status_data['provider_id']
+                        buyer_response = {
+                            'request_id': request_id,
+                            'status': response_status,
+                            'contract': {
+                                'contract_id': contract_id,
+                                'buyer_id': original_request.buyer_id,
+                                'provider_id': provider_id,
+                                'space_gb': original_request.space_gb,
+                                'duration_hours': original_request.duration_hours,
+                                'price': total_cost,
+                                'start_time': now,
+                                'end_time': end_ts,
+                                'status': 'active'
+                            },
+                            'total_cost': total_cost
+                        }
+                        
+                        if corrupted:
+                            buyer_response['reason'] = response_reason
+                    else:
+                        stats['failed_allocations'] += 1
+                        buyer_response = {
+                            'request_id': request_id,
+                            'status': 'failure',
+                            'reason': response_data.get('reason', 'provider_rejected')
+                        }
                     
-                    if provider_id in self.agent.providers:
-                        provider = self.agent.providers[provider_id]
-                        provider.available_space_gb = status_data['available_space_gb']
-                        provider.reputation = status_data['reputation']
-                        provider.last_seen = time.time()
+                    # Send response to buyer
+                    buyer_msg = copy.copy(agent.response_msg_proto)
+                    buyer_msg.to = buyer_jid
+                    buyer_msg.body = _encode(buyer_response)
+                    
+                    # Simulate network latency
+                    await self.simulate_network_delay()
+                    await send_message(self, buyer_msg)
+            
+            except json.JSONDecodeError:
+                logger.error("Invalid JSON in allocation response: %s", msg.body)
+        
+        async def handle_status_update(self, msg: Message):
+            """Handles status updates from providers"""
+            try:
+                status_data = _decode(msg.body)
+                provider_id = status_data['provider_id']
                 
-                except json.JSONDecodeError:
-                    logger.error(f"Invalid JSON in status update: {msg.body}")
+                if provider_id in self.agent.providers:
+                    provider = self.agent.providers[provider_id]
+                    provider.available_space_gb = status_data['available_space_gb']
+                    provider.reputation = status_data['reputation']
+                    provider.last_seen = clock_cache.now
+                    self.agent.provider_table.sync(provider)
+                    heapq.heappush(self.agent.liveness_heap, (provider.last_seen, provider_id))
+            
+            except json.JSONDecodeError:
+                logger.error("Invalid JSON in status update: %s", msg.body)
     
     class ProviderCleanupBehaviour(PeriodicBehaviour):
         """Removes inactive providers"""
         
         async def run(self):
-            current_time = time.time()
-            inactive_providers = []
-            
-            for provider_id, provider in self.agent.providers.items():
-                if current_time - provider.last_seen > 120:  # 2 minutes timeout
-                    inactive_providers.append(provider_id)
+            current_time = clock_cache.now
+            liveness_heap = self.agent.liveness_heap
             
-            for provider_id in inactive_providers:
-                del self.agent.providers[provider_id]
-                logger.info(f"🧹 Network removed inactive provider {provider_id}")
+            # Pop only the heartbeats older than the 2 minutes timeout; an entry is
+            # current only if it still matches the provider's last_seen
+            while liveness_heap and current_time - liveness_heap[0][0] > 120:
+                last_seen, provider_id = heapq.heappop(liveness_heap)
+                provider = self.agent.providers.get(provider_id)
+                if provider is not None and provider.last_seen == last_seen:
+                    self.agent.remove_provider(provider_id)
+                    logger.info("🧹 Network removed inactive provider %s", provider_id)
             
             self.agent.stats['provider_count'] = len(self.agent.providers)
         
         async def on_start(self):
             self.period = 30  # Cleanup every 30 seconds
 
-async def run_single_simulation(duration: int = 60) -> Dict:
-    """Run a single simulation iteration"""
-    logger.info(f"🚀 Starting simulation for {duration} seconds")
+def create_agents(iteration_id: int = 0, seed: Optional[int] = None):
+    """Create the network, provider and buyer agents of one simulation"""
+    # Iteration-specific JIDs so concurrent iterations do not share XMPP sessions
+    network_jid = f"network{iteration_id}@localhost"
     
-    # Reset metrics
-    global_metrics.reset()
+    # Independent child seeds: one for the provider parameters and one per agent
+    num_providers = 3
+    num_buyers = 2
+    seeds = np.random.SeedSequence(seed).spawn(2 + num_providers + num_buyers)
     
     # Create network agent
-    network_agent = IntermediaryNetworkAgent("network@localhost", "network_pass")
-    await network_agent.start()
+    network_agent = IntermediaryNetworkAgent(network_jid, "network_pass", seed=seeds[1])
+    
+    # Draw every provider's parameters at once (reproducible from the iteration seed)
+    rng = np.random.default_rng(seeds[0])
+    capacities = rng.integers(50, 151, size=num_providers).tolist()
+    prices = rng.uniform(0.3, 0.8, size=num_providers).tolist()
+    failure_probs = rng.uniform(0.05, 0.15, size=num_providers).tolist()
     
     # Create provider agents
     providers = []
-    for i in range(3):
-        provider_jid = f"provider{i}@localhost"
+    for i in range(num_providers):
+        provider_jid = f"provider{iteration_id}_{i}@localhost"
         provider = StorageProviderAgent(
             jid=provider_jid,
             password=f"provider{i}_pass",
-            network_jid="network@localhost",
-            total_space_gb=random.randint(50, 150),
-            price_per_gb_hour=random.uniform(0.3, 0.8),
-            failure_probability=random.uniform(0.05, 0.15)
+            network_jid=network_jid,
+            total_space_gb=capacities[i],
+            price_per_gb_hour=prices[i],
+            failure_probability=failure_probs[i],
+            seed=seeds[2 + i]
         )
         providers.append(provider)
-        await provider.start()
-        await asyncio.sleep(1)  # Give time for registration
     
     # Create buyer agents
     buyers = []
-    for i in range(2):
-        buyer_jid = f"buyer{i}@localhost"
+    for i in range(num_buyers):
+        buyer_jid = f"buyer{iteration_id}_{i}@localhost"
         buyer = BuyerAgent(
             jid=buyer_jid,
             password=f"buyer{i}_pass",
-            network_jid="network@localhost",
-            request_interval=(5, 15)
+            network_jid=network_jid,
+            request_interval=(5, 15),
+            seed=seeds[2 + num_providers + i]
         )
         buyers.append(buyer)
-        await buyer.start()
-        await asyncio.sleep(0.5)
     
-    # Let simulation run
-    await asyncio.sleep(duration)
+    return network_agent, providers, buyers
+
+async def start_agents(network_agent, providers, buyers):
+    """Start the network, then all providers together, with a single pause for
+    their registrations to reach the network before buyers start requesting"""
+    await network_agent.start()
+    await asyncio.gather(*(provider.start() for provider in providers))
+    await asyncio.sleep(1)  # Give time for registration
+    await asyncio.gather(*(buyer.start() for buyer in buyers))
+
+async def stop_agents(agents):
+    """Stop every agent; one failing shutdown neither aborts the others nor loses the results"""
+    results = await asyncio.gather(*(agent.stop() for agent in agents), return_exceptions=True)
+    for agent, result in zip(agents, results):
+        if isinstance(result, Exception):
+            logger.error("Error stopping agent %s: %r", agent.jid, result)
+
+def reset_agent_stats(agents):
+    """Zero the per-agent counters between iterations (gauges such as provider_count are kept)"""
+    for agent in agents:
+        agent.stats = {k: v if k == 'provider_count' else type(v)() for k, v in agent.stats.items()}
+
+async def measure_iteration(network_agent, providers, buyers, duration: int,
+                            target_requests: Optional[int] = None) -> Dict:
+    """Run already started agents for one iteration and collect its results"""
+    # Optionally finish as soon as enough buyer requests have been answered
+    done = asyncio.Event()
+    if target_requests is not None:
+        global_metrics.set_request_target(target_requests, done)
     
-    # Stop all agents
-    for agent in [network_agent] + providers + buyers:
-        await agent.stop()
+    # Let simulation run until the request target is reached (at most `duration` seconds)
+    try:
+        await asyncio.wait_for(done.wait(), timeout=duration)
+    except asyncio.TimeoutError:
+        pass
     
     # Collect metrics
     metrics = global_metrics.get_summary()
     
-    # Add agent-specific stats
-    metrics['network_stats'] = network_agent.stats
-    metrics['provider_stats'] = [p.stats for p in providers]
-    metrics['buyer_stats'] = [b.stats for b in buyers]
+    # Add agent-specific stats, snapshotted: the agents keep running (and counting) until stopped
+    metrics['network_stats'] = dict(network_agent.stats)
+    metrics['provider_stats'] = [dict(p.stats) for p in providers]
+    metrics['buyer_stats'] = [dict(b.stats) for b in buyers]
     
     return metrics
 
-async def run_monte_carlo_simulation(iterations: int = 5, duration_per_iteration: int = 45):
-    """Run Monte Carlo simulation with multiple iterations"""
-    logger.info(f"🎯 Starting Monte Carlo simulation: {iterations} iterations of {duration_per_iteration}s each")
+async def run_single_simulation(duration: int = 60, iteration_id: int = 0,
+                                seed: Optional[int] = None,
+                                target_requests: Optional[int] = None) -> Dict:
+    """Run a single simulation iteration"""
+    logger.info("🚀 Starting simulation for %s seconds", duration)
     
-    all_results = []
+    # Reset metrics
+    global_metrics.reset()
     
-    for i in range(iterations):
-        logger.info(f"\n=== ITERATION {i+1}/{iterations} ===")
-        
-        try:
-            # Run single simulation
-            result = await run_single_simulation(duration_per_iteration)
-            all_results.append(result)
+    network_agent, providers, buyers = create_agents(iteration_id, seed)
+    
+    # Keep the cached liveness clock ticking while the agents run
+    clock_task = asyncio.create_task(clock_cache.run())
+    
+    await start_agents(network_agent, providers, buyers)
+    metrics = await measure_iteration(network_agent, providers, buyers, duration, target_requests)
+    
+    # Stop all agents
+    await stop_agents([network_agent] + providers + buyers)
+    clock_task.cancel()
+    
+    return metrics
+
+async def run_warm_simulations(iteration_ids: List[int], duration: int, seeds: List[int],
+                               target_requests: Optional[int] = None) -> List[Tuple[int, Dict]]:
+    """Run several iterations on one set of agents, started once and stopped once"""
+    network_agent, providers, buyers = create_agents(iteration_ids[0], seeds[0])
+    agents = [network_agent] + providers + buyers
+    
+    clock_task = asyncio.create_task(clock_cache.run())
+    await start_agents(network_agent, providers, buyers)
+    
+    results = []
+    try:
+        for i in iteration_ids:
+            logger.info("🚀 Starting simulation for %s seconds", duration)
             
-            # Log iteration results
-            logger.info(f"📊 Iteration {i+1} Results:")
-            logger.info(f"  Success Rate: {result['success_rate']:.2f}%")
-            logger.info(f"  Avg Response Time: {result['avg_response_time']:.2f}s")
-            logger.info(f"  Provider Utilization: {result['avg_provider_utilization']:.2f}")
-            logger.info(f"  Network Corruptions: {result['network_corruptions']}")
+            # Fresh counters; agents, their random streams, contracts and registrations carry over
+            global_metrics.reset()
+            reset_agent_stats(agents)
             
-        except Exception as e:
-            logger.error(f"Error in iteration {i+1}: {e}")
-            continue
+            results.append((i, await measure_iteration(network_agent, providers, buyers,
+                                                       duration, target_requests)))
+    finally:
+        await stop_agents(agents)
+        clock_task.cancel()
+    
+    return results
+
+def _flatten_result(iteration_id: int, result: Dict) -> Tuple[Dict, List[Dict], List[Dict]]:
+    """Split an iteration result into a scalar summary row and per-agent stat rows"""
+    summary = {'iteration_id': iteration_id}
+    summary.update((k, v) for k, v in result.items() if k not in ('network_stats', 'provider_stats', 'buyer_stats'))
+    summary.update((f"network_{k}", v) for k, v in result['network_stats'].items())
+    providers = [{'iteration_id': iteration_id, 'provider': i, **stats} for i, stats in enumerate(result['provider_stats'])]
+    buyers = [{'iteration_id': iteration_id, 'buyer': i, **stats} for i, stats in enumerate(result['buyer_stats'])]
+    return summary, providers, buyers
+
+def write_parquet_results(prefix: str, summary_rows: List[Dict], provider_rows: List[Dict],
+                          buyer_rows: List[Dict]) -> List[str]:
+    """Write the flattened results as zstd-compressed Parquet tables"""
+    paths = []
+    for suffix, rows in (("", summary_rows), ("_providers", provider_rows), ("_buyers", buyer_rows)):
+        if rows:
+            path = f"{prefix}{suffix}.parquet"
+            pq.write_table(pa.Table.from_pylist(rows), path, compression='zstd')
+            paths.append(path)
+    return paths
+
+def _run_iteration_sync(iteration_id: int, duration: int, seed: int, virtual_time: bool,
+                        target_requests: Optional[int] = None) -> Dict:
+    """Run one iteration on its own event loop (entry point for worker processes)"""
+    clock.virtual = virtual_time
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(run_single_simulation(duration, iteration_id, seed, target_requests))
+
+def _run_warm_batch_sync(iteration_ids: List[int], duration: int, seeds: List[int], virtual_time: bool,
+                         target_requests: Optional[int] = None) -> List[Tuple[int, Dict]]:
+    """Run a batch of iterations on one warm set of agents (entry point for worker processes)"""
+    clock.virtual = virtual_time
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(run_warm_simulations(iteration_ids, duration, seeds, target_requests))
+
+async def run_monte_carlo_simulation(iterations: int = 5, duration_per_iteration: int = 45,
+                                     target_requests: Optional[int] = None, warm_start: bool = False):
+    """Run Monte Carlo simulation with multiple iterations
+    
+    With warm_start each worker process starts its agents once and reuses them
+    for its share of the iterations, resetting metrics and counters in between.
+    """
+    logger.info("🎯 Starting Monte Carlo simulation: %s iterations of %ss each", iterations, duration_per_iteration)
+    
+    # Running statistics (Welford) so iteration results need not be kept in memory
+    keys = ('success_rate', 'avg_response_time', 'avg_provider_utilization', 'network_corruptions')
+    count = 0
+    means = np.zeros(len(keys))
+    m2 = np.zeros(len(keys))
+    total_requests = 0
+    total_successful = 0
+    
+    # Flat per-iteration rows for the columnar (Parquet) output
+    summary_rows, provider_rows, buyer_rows = [], [], []
+    
+    # Each iteration is appended to a JSON Lines file as soon as it finishes
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    results_file = f"simulation_results_{timestamp}.jsonl"
+    
+    # Iterations are independent, so each runs in its own process with its own seed
+    loop = asyncio.get_running_loop()
+    seeds = np.random.SeedSequence().generate_state(iterations).tolist()
+    
+    workers = min(iterations, os.cpu_count() or 1)
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+         open(results_file, 'wb') as f:
         
-        # Small break between iterations
-        if i < iterations - 1:
-            await asyncio.sleep(3)
+        async def run_iteration(i: int):
+            try:
+                return [(i, await loop.run_in_executor(pool, _run_iteration_sync, i, duration_per_iteration,
+                                                       seeds[i], clock.virtual, target_requests))]
+            except Exception as e:
+                return [(i, e)]
+        
+        async def run_batch(ids: List[int]):
+            try:
+                return await loop.run_in_executor(pool, _run_warm_batch_sync, ids, duration_per_iteration,
+                                                  [seeds[i] for i in ids], clock.virtual, target_requests)
+            except Exception as e:
+                return [(i, e) for i in ids]
+        
+        if warm_start:
+            # One batch of iterations per worker, each on its own warm agents
+            tasks = [run_batch(list(range(w, iterations, workers))) for w in range(workers)]
+        else:
+            tasks = [run_iteration(i) for i in range(iterations)]
+        
+        for next_done in asyncio.as_completed(tasks):
+            for i, result in await next_done:
+                logger.info("\n=== ITERATION %s/%s ===", i + 1, iterations)
+            
+                if isinstance(result, Exception):
+                    logger.error("Error in iteration %s: %s", i + 1, result)
+                    continue
+            
+                # Rows arrive in completion order; tag each with its iteration and seed
+                f.write(_encode_line({'iteration': i + 1, 'seed': seeds[i], **result}))
+                if pa is not None:
+                    summary, providers, buyers = _flatten_result(i, result)
+                    summary_rows.append(summary)
+                    provider_rows.extend(providers)
+                    buyer_rows.extend(buyers)
+            
+                count += 1
+                x = np.array([result[k] for k in keys], dtype=np.float64)
+                delta = x - means
+                means += delta / count
+                m2 += delta * (x - means)
+                total_requests += result['total_requests']
+                total_successful += result['successful_requests']
+            
+                # Log iteration results (skipped entirely when INFO is filtered out)
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("📊 Iteration %s Results:", i + 1)
+                    logger.info("  Success Rate: %.2f%%", result['success_rate'])
+                    logger.info("  Avg Response Time: %.2fs", result['avg_response_time'])
+                    logger.info("  Provider Utilization: %.2f", result['avg_provider_utilization'])
+                    logger.info("  Network Corruptions: %s", result['network_corruptions'])
     
     # Calculate aggregate statistics
-    if all_results:
+    if count:
         logger.info("\n🔥 MONTE CARLO SIMULATION RESULTS 🔥")
         logger.info("=" * 50)
         
         # Calculate means and standard deviations
-        success_rates = [r['success_rate'] for r in all_results]
-        response_times = [r['avg_response_time'] for r in all_results]
-        utilizations = [r['avg_provider_utilization'] for r in all_results]
-        corruptions = [r['network_corruptions'] for r in all_results]
+        stds = np.sqrt(m2 / (count - 1)) if count > 1 else np.zeros(len(keys))
         
-        logger.info(f"Success Rate: {statistics.mean(success_rates):.2f}% ± {statistics.stdev(success_rates) if len(success_rates) > 1 else 0:.2f}%")
-        logger.info(f"Response Time: {statistics.mean(response_times):.2f}s ± {statistics.stdev(response_times) if len(response_times) > 1 else 0:.2f}s")
-        logger.info(f"Provider Utilization: {statistics.mean(utilizations):.2f} ± {statistics.stdev(utilizations) if len(utilizations) > 1 else 0:.2f}")
-        logger.info(f"Network Corruptions: {statistics.mean(corruptions):.1f} ± {statistics.stdev(corruptions) if len(corruptions) > 1 else 0:.1f}")
+        logger.info("Success Rate: %.2f%% ± %.2f%%", means[0], stds[0])
+        logger.info("Response Time: %.2fs ± %.2fs", means[1], stds[1])
+        logger.info("Provider Utilization: %.2f ± %.2f", means[2], stds[2])
+        logger.info("Network Corruptions: %.1f ± %.1f", means[3], stds[3])
         
         # Additional statistics
-        total_requests = sum(r['total_requests'] for r in all_results)
-        total_successful = sum(r['successful_requests'] for r in all_results)
-        
-        logger.info(f"\nAggregate Statistics:")
-        logger.info(f"Total Requests: {total_requests}")
-        logger.info(f"Total Successful: {total_successful}")
-        logger.info(f"Overall Success Rate: {(total_successful/max(total_requests,1))*100:.2f}%")
-        
-        # Save results to file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        results_file = f"simulation_results_{timestamp}.json"
+        logger.info("\nAggregate Statistics:")
+        logger.info("Total Requests: %s", total_requests)
+        logger.info("Total Successful: %s", total_successful)
+        logger.info("Overall Success Rate: %.2f%%", total_successful / max(total_requests, 1) * 100)
         
-        with open(results_file, 'w') as f:
-            json.dump(all_results, f, indent=2)
-        
-        logger.info(f"📄 Results saved to {results_file}")
+        logger.info("📄 Results saved to %s", results_file)
+        if pa is not None:
+            for path in write_parquet_results(f"simulation_results_{timestamp}", summary_rows, provider_rows, buyer_rows):
+                logger.info("📄 Results saved to %s", path)
         
     else:
         logger.error("No successful simulation iterations!")
 
 if __name__ == "__main__":
+    # --virtual-time models network and decision delays without sleeping through them
+    clock.virtual = "--virtual-time" in sys.argv
+    
     # Run the simulation
-    asyncio.run(run_monte_carlo_simulation(iterations=3, duration_per_iteration=30))
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        # --warm reuses each worker's agents across its iterations instead of restarting them
+        runner.run(run_monte_carlo_simulation(iterations=3, duration_per_iteration=30,
+                                              warm_start="--warm" in sys.argv))
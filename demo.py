@@ -17,7 +17,7 @@ import logging
 import json
 from datetime import datetime
 
-from enhanced_cloud_storage import run_monte_carlo_simulation
+from enhanced_cloud_storage import loop_factory, run_monte_carlo_simulation
 
 # Configure logging for demo
 logging.basicConfig(
@@ -189,4 +189,6 @@ async def main():
     print("\n✨ Happy researching! ✨")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Same event loop selection as the simulation module (uvloop when installed)
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main())
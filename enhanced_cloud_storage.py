@@ -9,15 +9,52 @@ Implements all requested features:
 """
 
 import asyncio
+import heapq
 import random
 import time
 import json
 import logging
+import os
 import statistics
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields, replace
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple, Any
 
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None  # numba not installed - summary statistics use NumPy reductions
+
+# Prefer orjson's C codec for the result files; fall back to the stdlib json module
+try:
+    import orjson
+    
+    def _encode_line(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+    
+    def _encode_pretty(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    def _encode_line(obj) -> bytes:
+        return (json.dumps(obj) + "\n").encode()
+    
+    def _encode_pretty(obj) -> bytes:
+        return json.dumps(obj, indent=2).encode()
+
+# Prefer uvloop's libuv-based event loop when it is available
+loop_factory = None  # asyncio.Runner falls back to the default loop
+if sys.platform != "win32":
+    try:
+        import uvloop
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        pass  # uvloop not installed (or failed to build) - keep the stdlib loop
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, 
@@ -25,17 +62,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger("EnhancedCloudStorageSim")
 
-@dataclass
+# Simulation timestamps are integer nanoseconds on the monotonic clock;
+# they are converted to seconds only when recorded or reported
+_now = time.monotonic_ns
+NS_PER_S = 1_000_000_000
+NS_PER_HOUR = 3600 * NS_PER_S
+
+@dataclass(slots=True)
 class StorageRequest:
     """Storage request data structure"""
     buyer_id: str
     space_gb: int
     duration_hours: float
     max_price_per_gb_hour: float
-    timestamp: float
+    timestamp: int  # monotonic ns
     request_id: str
 
-@dataclass
+@dataclass(slots=True)
 class StorageContract:
     """Storage contract data structure"""
     contract_id: str
@@ -45,11 +88,28 @@ class StorageContract:
     duration_hours: float
     price_per_gb_hour: float
     total_cost: float
-    start_time: float
-    end_time: float
+    start_time: int  # monotonic ns
+    end_time: int  # monotonic ns
     status: str  # 'pending', 'active', 'completed', 'failed'
+    
+    @classmethod
+    def from_request(cls, request: StorageRequest, provider: 'ProviderInfo') -> 'StorageContract':
+        """Pending contract for a request at the provider's current price"""
+        now = _now()
+        return cls(
+            contract_id=f"CONT-{now // NS_PER_S}-{random.randint(1000, 9999)}",
+            buyer_id=request.buyer_id,
+            provider_id=provider.agent_id,
+            space_gb=request.space_gb,
+            duration_hours=request.duration_hours,
+            price_per_gb_hour=provider.price_per_gb_hour,
+            total_cost=request.space_gb * request.duration_hours * provider.price_per_gb_hour,
+            start_time=now,
+            end_time=now + int(request.duration_hours * NS_PER_HOUR),
+            status='pending'
+        )
 
-@dataclass
+@dataclass(slots=True)
 class ProviderInfo:
     """Provider information maintained by the network"""
     agent_id: str
@@ -57,11 +117,150 @@ class ProviderInfo:
     available_space_gb: int
     reputation: float
     price_per_gb_hour: float
-    last_seen: float
+    last_seen: int  # monotonic ns
     success_count: int
     failure_count: int
     response_time_avg: float
 
+@dataclass(slots=True)
+class Envelope:
+    """Message envelope carried by the message bus"""
+    sender: str
+    recipient: str
+    body: Dict[str, Any]
+    timestamp: int  # Arrival time, monotonic ns
+    latency: float
+    id: int
+
+@lru_cache(maxsize=None)
+def _field_names(cls) -> Tuple[str, ...]:
+    return tuple(f.name for f in fields(cls))
+
+def fast_asdict(obj) -> Dict[str, Any]:
+    """Shallow asdict() for the flat message dataclasses: no recursion or deepcopy"""
+    return {name: getattr(obj, name) for name in _field_names(type(obj))}
+
+def _mean_std_numpy(a):
+    """Mean and sample standard deviation of a non-empty array"""
+    return float(a.mean()), float(a.std(ddof=1)) if a.shape[0] > 1 else 0.0
+
+def _mean_std_loop(a):
+    """Single-pass Welford mean and sample standard deviation (compiled with numba)"""
+    n = a.shape[0]
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        d = a[i] - mean
+        mean += d / (i + 1)
+        m2 += d * (a[i] - mean)
+    return mean, (m2 / (n - 1)) ** 0.5 if n > 1 else 0.0
+
+# One memory sweep per column when numba is available, instead of mean() then std()
+mean_std = njit(cache=True)(_mean_std_loop) if njit is not None else _mean_std_numpy
+
+class SampleColumn:
+    """Growable float64 sample column; doubles its preallocated buffer when full"""
+    
+    __slots__ = ('buf', 'n')
+    
+    def __init__(self, capacity: int = 1024):
+        self.buf = np.empty(capacity, dtype=np.float64)
+        self.n = 0
+    
+    def push(self, value: float):
+        if self.n == len(self.buf):
+            self.buf = np.resize(self.buf, len(self.buf) * 2)
+        self.buf[self.n] = value
+        self.n += 1
+    
+    def values(self) -> np.ndarray:
+        """View of the recorded samples"""
+        return self.buf[:self.n]
+    
+    def extend(self, values: np.ndarray):
+        """Append a block of samples with one array copy"""
+        end = self.n + len(values)
+        if end > len(self.buf):
+            self.buf = np.resize(self.buf, max(end, len(self.buf) * 2))
+        self.buf[self.n:end] = values
+        self.n = end
+    
+    def clear(self):
+        self.n = 0
+    
+    def mean_std(self) -> Tuple[float, float]:
+        """Mean and sample standard deviation (0 when there are no samples)"""
+        return mean_std(self.values()) if self.n else (0, 0)
+    
+    def __len__(self) -> int:
+        return self.n
+
+class RandPool:
+    """Pool of uniform [0, 1) draws generated in large numpy batches
+    
+    Hot paths take scaled draws from the pool instead of calling the
+    random module once per value.
+    """
+    
+    __slots__ = ('rng', 'size', 'buf', 'idx')
+    
+    def __init__(self, seed: Optional[int] = None, size: int = 1 << 16):
+        self.rng = np.random.default_rng(seed)
+        self.size = size
+        self.buf: List[float] = []
+        self.idx = size  # Filled lazily on the first draw
+    
+    def seed(self, seed: Optional[int]):
+        """Restart the pool from a new seed, dropping the buffered draws"""
+        self.rng = np.random.default_rng(seed)
+        self.idx = self.size
+    
+    def random(self) -> float:
+        if self.idx == self.size:
+            self.buf = self.rng.random(self.size).tolist()
+            self.idx = 0
+        value = self.buf[self.idx]
+        self.idx += 1
+        return value
+    
+    def uniform(self, a: float, b: float) -> float:
+        return a + (b - a) * self.random()
+    
+    def randint(self, lo: int, hi: int) -> int:
+        """Integer in [lo, hi], both ends included like random.randint"""
+        return lo + int((hi - lo + 1) * self.random())
+
+# Shared draw pool for the per-message random decisions
+rand_pool = RandPool()
+
+class LocalMetrics:
+    """Per-agent shard of the sample columns, merged into SimulationMetrics in bulk
+    
+    Agents push their samples here instead of into the shared columns; event
+    counters stay on SimulationMetrics so request targets fire immediately.
+    """
+    
+    __slots__ = ('response_times', 'provider_utilizations', 'provider_reputations',
+                 'provider_earnings', 'network_latencies')
+    
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, SampleColumn(256))
+    
+    def record_response_time(self, response_time: float):
+        if response_time > 0:
+            self.response_times.push(response_time)
+    
+    def record_provider_metrics(self, utilization: float, reputation: float, earnings: float = 0):
+        self.provider_utilizations.push(utilization)
+        self.provider_reputations.push(reputation)
+        if earnings > 0:
+            self.provider_earnings.push(earnings)
+    
+    def record_latency(self, latency: float):
+        if latency > 0:
+            self.network_latencies.push(latency)
+
 class SimulationMetrics:
     """Enhanced metrics collection for Monte Carlo analysis"""
     
@@ -70,38 +269,66 @@ class SimulationMetrics:
     
     def reset(self):
         """Reset all metrics for new simulation run"""
-        self.start_time = time.time()
+        self.start_time = _now()
         
         # Request metrics
         self.total_requests = 0
         self.successful_requests = 0
         self.failed_requests = 0
-        self.response_times = []
+        self.answered_requests = 0  # Responses received; drives the request target
+        self.response_times = SampleColumn()
         
         # Contract metrics
         self.contracts_created = 0
         self.contracts_completed = 0
         self.contracts_failed = 0
-        self.contract_durations = []
-        self.contract_values = []
+        self.contract_durations = SampleColumn()
+        self.contract_values = SampleColumn()
         
         # Provider metrics
-        self.provider_utilizations = []
-        self.provider_reputations = []
-        self.provider_earnings = []
+        self.provider_utilizations = SampleColumn()
+        self.provider_reputations = SampleColumn()
+        self.provider_earnings = SampleColumn()
         
         # Network metrics
         self.network_corruptions = 0
         self.provider_failures = 0
-        self.network_latencies = []
+        self.network_latencies = SampleColumn()
         
         # System metrics
         self.total_space_allocated = 0
         self.peak_utilization = 0.0
         self.avg_utilization = 0.0
         
-    def record_request(self, successful: bool, response_time: float = 0):
-        """Record a storage request"""
+        # Optional completion signal
+        self.request_target = None
+        self.target_event = None
+        
+        # Per-agent sample shards, merged on demand
+        self.shards: List[LocalMetrics] = []
+    
+    def local_shard(self) -> LocalMetrics:
+        """Create a sample shard for one agent; it is merged before summaries"""
+        shard = LocalMetrics()
+        self.shards.append(shard)
+        return shard
+    
+    def merge_shards(self):
+        """Move every shard's pending samples into the shared columns"""
+        for shard in self.shards:
+            for name in LocalMetrics.__slots__:
+                column = getattr(shard, name)
+                if column.n:
+                    getattr(self, name).extend(column.values())
+                    column.clear()
+    
+    def set_request_target(self, target: int, event: asyncio.Event):
+        """Set event once the given number of requests has been answered"""
+        self.request_target = target
+        self.target_event = event
+        
+    def record_request(self, successful: bool, response_time: float = 0, answered: bool = True):
+        """Record a storage request (answered=False for the send-side placeholder)"""
         self.total_requests += 1
         if successful:
             self.successful_requests += 1
@@ -109,23 +336,28 @@ class SimulationMetrics:
             self.failed_requests += 1
         
         if response_time > 0:
-            self.response_times.append(response_time)
+            self.response_times.push(response_time)
+        
+        if answered:
+            self.answered_requests += 1
+            if self.target_event is not None and self.answered_requests >= self.request_target:
+                self.target_event.set()
     
     def record_contract(self, contract: StorageContract, completed: bool = False):
         """Record contract information"""
         if contract.status == 'active':
             self.contracts_created += 1
-            self.contract_durations.append(contract.duration_hours)
-            self.contract_values.append(contract.total_cost)
+            self.contract_durations.push(contract.duration_hours)
+            self.contract_values.push(contract.total_cost)
         elif completed:
             self.contracts_completed += 1
     
     def record_provider_metrics(self, utilization: float, reputation: float, earnings: float = 0):
         """Record provider metrics"""
-        self.provider_utilizations.append(utilization)
-        self.provider_reputations.append(reputation)
+        self.provider_utilizations.push(utilization)
+        self.provider_reputations.push(reputation)
         if earnings > 0:
-            self.provider_earnings.append(earnings)
+            self.provider_earnings.push(earnings)
     
     def record_network_event(self, event_type: str, latency: float = 0):
         """Record network events"""
@@ -135,27 +367,27 @@ class SimulationMetrics:
             self.provider_failures += 1
         
         if latency > 0:
-            self.network_latencies.append(latency)
+            self.network_latencies.push(latency)
     
     def get_summary(self) -> Dict[str, Any]:
         """Generate comprehensive simulation summary"""
-        simulation_duration = time.time() - self.start_time
+        simulation_duration = (_now() - self.start_time) / NS_PER_S
+        self.merge_shards()
         
         # Calculate success rate
         success_rate = (self.successful_requests / max(self.total_requests, 1)) * 100
         
-        # Calculate average metrics
-        avg_response_time = statistics.mean(self.response_times) if self.response_times else 0
-        std_response_time = statistics.stdev(self.response_times) if len(self.response_times) > 1 else 0
+        # Calculate average metrics directly on the sample buffers
+        avg_response_time, std_response_time = self.response_times.mean_std()
         
-        avg_contract_duration = statistics.mean(self.contract_durations) if self.contract_durations else 0
-        avg_contract_value = statistics.mean(self.contract_values) if self.contract_values else 0
+        avg_contract_duration = self.contract_durations.mean_std()[0]
+        avg_contract_value = self.contract_values.mean_std()[0]
         
-        avg_utilization = statistics.mean(self.provider_utilizations) if self.provider_utilizations else 0
-        avg_reputation = statistics.mean(self.provider_reputations) if self.provider_reputations else 0
+        avg_utilization = self.provider_utilizations.mean_std()[0]
+        avg_reputation = self.provider_reputations.mean_std()[0]
         
-        total_earnings = sum(self.provider_earnings) if self.provider_earnings else 0
-        avg_network_latency = statistics.mean(self.network_latencies) if self.network_latencies else 0
+        total_earnings = float(np.add.reduce(self.provider_earnings.values()))
+        avg_network_latency = self.network_latencies.mean_std()[0]
         
         return {
             'simulation_duration': simulation_duration,
@@ -189,54 +421,133 @@ class SimulationMetrics:
             }
         }
 
-# Global metrics instance
-global_metrics = SimulationMetrics()
+# Messages whose delivery deadlines fall within one tick are delivered together
+DELIVERY_TICK = 0.005
+
+# Coalesced messages are flushed as one batch after this window, or once this many are queued
+BATCH_WINDOW = 1.0
+BATCH_SIZE = 32
+
+# Mailbox marker put by close_mailbox(); handlers stop when they dequeue it
+MAILBOX_CLOSED = object()
 
 class MessageBus:
-    """Enhanced message bus with network latency simulation"""
+    """Enhanced message bus with network latency simulation
     
-    def __init__(self):
+    Latency is modelled as a delivery deadline: senders do not sleep, messages
+    wait in a deadline heap and a single loop timer delivers every message that
+    is due whenever it fires.
+    """
+    
+    def __init__(self, metrics: Optional[SimulationMetrics] = None):
         self.mailboxes = {}
         self.message_count = 0
+        self.delivery_heap = []  # (deliver_at, message id, envelope) of messages in flight
+        self.delivery_timer = None  # Loop timer for the earliest deadline
+        self.batches = {}  # to_agent -> messages waiting to be sent as one batch
+        # Default metrics for agents on this bus (one instance per simulation run)
+        self.metrics = metrics if metrics is not None else SimulationMetrics()
+        self.local_metrics = self.metrics.local_shard()
     
     def register_agent(self, agent_id: str):
         """Register an agent with the message bus"""
         self.mailboxes[agent_id] = asyncio.Queue()
-        logger.debug(f"Registered agent {agent_id}")
+        logger.debug("Registered agent %s", agent_id)
     
     async def send_message(self, from_agent: str, to_agent: str, message: Dict[str, Any], 
                           simulate_latency: bool = True):
         """Send message with optional network latency simulation"""
+        return self.post(from_agent, to_agent, message, simulate_latency)
+    
+    def post(self, from_agent: str, to_agent: str, message: Dict[str, Any],
+             simulate_latency: bool = True) -> bool:
+        """Synchronous core of send_message, usable from loop callbacks"""
+        if not simulate_latency:
+            return self.send_message_nowait(from_agent, to_agent, message)
+        
         if to_agent not in self.mailboxes:
-            logger.warning(f"Agent {to_agent} not registered")
+            logger.warning("Agent %s not registered", to_agent)
             return False
         
         # Simulate network latency
-        latency = 0
-        if simulate_latency:
-            latency = random.uniform(0.05, 0.5)  # 50ms to 500ms
-            await asyncio.sleep(latency)
-            global_metrics.record_network_event('latency', latency)
+        latency = rand_pool.uniform(0.05, 0.5)  # 50ms to 500ms
+        self.local_metrics.record_latency(latency)
         
         # Create message envelope
-        msg_envelope = {
-            'from': from_agent,
-            'to': to_agent,
-            'body': message,
-            'timestamp': time.time(),
-            'latency': latency,
-            'id': self.message_count
-        }
+        msg_envelope = Envelope(from_agent, to_agent, message, _now() + int(latency * NS_PER_S), latency,
+                                self.message_count)
         
         self.message_count += 1
         
         try:
-            await self.mailboxes[to_agent].put(msg_envelope)
+            self.schedule_delivery(msg_envelope, latency)
             return True
         except Exception as e:
-            logger.error(f"Failed to send message from {from_agent} to {to_agent}: {e}")
+            logger.error("Failed to send message from %s to %s: %s", from_agent, to_agent, e)
             return False
     
+    def send_message_nowait(self, from_agent: str, to_agent: str, message: Dict[str, Any]) -> bool:
+        """Deliver a message straight into the recipient's mailbox, without latency"""
+        mailbox = self.mailboxes.get(to_agent)
+        if mailbox is None:
+            logger.warning("Agent %s not registered", to_agent)
+            return False
+        
+        mailbox.put_nowait(Envelope(from_agent, to_agent, message, _now(), 0, self.message_count))
+        self.message_count += 1
+        return True
+    
+    def send_batch(self, from_agent: str, to_agent: str, messages: List[Dict[str, Any]],
+                   simulate_latency: bool = True) -> bool:
+        """Send several messages as a single envelope (one latency draw, one delivery)"""
+        return self.post(from_agent, to_agent, {'type': 'batched', 'items': messages}, simulate_latency)
+    
+    def queue_batched(self, to_agent: str, message: Dict[str, Any]):
+        """Coalesce a message with others bound for the same agent; flushed by window or size"""
+        batch = self.batches.setdefault(to_agent, [])
+        batch.append(message)
+        if len(batch) >= BATCH_SIZE:
+            self.flush_batch(to_agent)
+        elif len(batch) == 1:
+            asyncio.get_running_loop().call_later(BATCH_WINDOW, self.flush_batch, to_agent)
+    
+    def flush_batch(self, to_agent: str):
+        """Send whatever is queued for to_agent as one batch"""
+        batch = self.batches.pop(to_agent, None)
+        if batch:
+            self.send_batch('message_bus', to_agent, batch)
+    
+    def schedule_delivery(self, msg_envelope: Envelope, latency: float):
+        """Queue a message for delivery once its latency has elapsed"""
+        loop = asyncio.get_running_loop()
+        deliver_at = loop.time() + latency
+        heapq.heappush(self.delivery_heap, (deliver_at, msg_envelope.id, msg_envelope))
+        
+        # Re-arm the timer only when this message is the new earliest deadline
+        if self.delivery_heap[0][2] is msg_envelope:
+            if self.delivery_timer is not None:
+                self.delivery_timer.cancel()
+            self.delivery_timer = loop.call_at(deliver_at, self.deliver_due)
+    
+    def deliver_due(self):
+        """Deliver every message due within the current tick, then re-arm the timer"""
+        loop = asyncio.get_running_loop()
+        heap = self.delivery_heap
+        cutoff = loop.time() + DELIVERY_TICK
+        while heap and heap[0][0] <= cutoff:
+            msg_envelope = heapq.heappop(heap)[2]
+            self.mailboxes[msg_envelope.recipient].put_nowait(msg_envelope)
+        self.delivery_timer = loop.call_at(heap[0][0], self.deliver_due) if heap else None
+    
+    def close_mailbox(self, agent_id: str):
+        """Wake the agent's handler and make it exit once the queued messages are processed"""
+        self.mailboxes[agent_id].put_nowait(MAILBOX_CLOSED)
+    
+    async def next_message(self, agent_id: str) -> Optional[Envelope]:
+        """Block until the next message arrives; None once the mailbox has been closed"""
+        msg = await self.mailboxes[agent_id].get()
+        return None if msg is MAILBOX_CLOSED else msg
+    
     async def receive_message(self, agent_id: str, timeout: float = 10.0):
         """Receive message with timeout"""
         try:
@@ -244,23 +555,33 @@ class MessageBus:
         except asyncio.TimeoutError:
             return None
 
+# Upper bound on the answered StorageRequest objects a buyer keeps for reuse
+REQUEST_POOL_SIZE = 128
+
 class BuyerAgent:
     """Enhanced buyer agent with dynamic pricing and preferences"""
     
     def __init__(self, agent_id: str, broker_id: str, message_bus: MessageBus, 
                  request_interval: Tuple[float, float] = (3.0, 8.0),
-                 budget_per_hour: float = 10.0):
+                 budget_per_hour: float = 10.0,
+                 metrics: Optional[SimulationMetrics] = None):
         self.agent_id = agent_id
         self.broker_id = broker_id
         self.message_bus = message_bus
+        self.metrics = metrics if metrics is not None else message_bus.metrics
+        self.local_metrics = self.metrics.local_shard()  # Response time samples, merged in bulk
         self.request_interval = request_interval
         self.budget_per_hour = budget_per_hour
         
         # State tracking
         self.pending_requests = {}
+        self.request_pool: List[StorageRequest] = []  # Answered requests, reused for new ones
         self.active_contracts = {}
+        self.completion_heap = []  # (end_time, contract_id) min-heap of active contracts
         self.completed_contracts = []
         self.running = False
+        self.drained = asyncio.Event()  # Set once the response handler has exited
+        self.started = asyncio.Event()  # Set once start() has finished
         
         # Enhanced statistics
         self.stats = {
@@ -285,35 +606,61 @@ class BuyerAgent:
         # Start response handling
         asyncio.create_task(self.response_handler())
         
-        logger.info(f"🛒 Buyer {self.agent_id} started with budget ${self.budget_per_hour:.2f}/hour")
+        # Start contract completion tracking
+        asyncio.create_task(self.completion_tracker())
+        
+        logger.info("🛒 Buyer %s started with budget $%.2f/hour", self.agent_id, self.budget_per_hour)
+        self.started.set()
     
     async def stop(self):
         """Stop buyer agent"""
         self.running = False
-        logger.info(f"🛒 Buyer {self.agent_id} stopped")
+        self.message_bus.close_mailbox(self.agent_id)
+        logger.info("🛒 Buyer %s stopped", self.agent_id)
+    
+    async def drain(self):
+        """Wait until the response handler has finished processing"""
+        await self.drained.wait()
+    
+    async def run(self, stop_event: asyncio.Event):
+        """Run the agent until stop_event is set, then stop and drain it"""
+        await self.start()
+        try:
+            await stop_event.wait()
+        finally:
+            await self.stop()
+        await self.drain()
     
     async def request_behavior(self):
         """Generate storage requests periodically"""
         while self.running:
             try:
                 # Generate request parameters
-                space_needed = random.randint(5, 50)  # 5-50 GB
-                duration = random.uniform(0.5, 6.0)   # 0.5-6 hours
+                space_needed = rand_pool.randint(5, 50)  # 5-50 GB
+                duration = rand_pool.uniform(0.5, 6.0)   # 0.5-6 hours
                 max_price = min(
-                    random.uniform(0.2, 1.5),  # $0.2-1.5 per GB/hour
+                    rand_pool.uniform(0.2, 1.5),  # $0.2-1.5 per GB/hour
                     self.budget_per_hour / space_needed  # Budget constraint
                 )
                 
-                request_id = f"REQ-{self.agent_id}-{int(time.time())}-{random.randint(100, 999)}"
+                request_id = f"REQ-{self.agent_id}-{_now() // NS_PER_S}-{random.randint(100, 999)}"
                 
-                request = StorageRequest(
-                    buyer_id=self.agent_id,
-                    space_gb=space_needed,
-                    duration_hours=duration,
-                    max_price_per_gb_hour=max_price,
-                    timestamp=time.time(),
-                    request_id=request_id
-                )
+                if self.request_pool:
+                    request = self.request_pool.pop()
+                    request.space_gb = space_needed
+                    request.duration_hours = duration
+                    request.max_price_per_gb_hour = max_price
+                    request.timestamp = _now()
+                    request.request_id = request_id
+                else:
+                    request = StorageRequest(
+                        buyer_id=self.agent_id,
+                        space_gb=space_needed,
+                        duration_hours=duration,
+                        max_price_per_gb_hour=max_price,
+                        timestamp=_now(),
+                        request_id=request_id
+                    )
                 
                 # Store pending request
                 self.pending_requests[request_id] = request
@@ -321,7 +668,7 @@ class BuyerAgent:
                 # Send to broker
                 message = {
                     'type': 'storage_request',
-                    'request': asdict(request)
+                    'request': fast_asdict(request)
                 }
                 
                 success = await self.message_bus.send_message(
@@ -330,36 +677,36 @@ class BuyerAgent:
                 
                 if success:
                     self.stats['requests_sent'] += 1
-                    global_metrics.record_request(False)  # Will be updated when response received
+                    self.metrics.record_request(False, answered=False)  # Will be updated when response received
                     
-                    logger.info(f"🛒 {self.agent_id} requested {space_needed}GB for {duration:.1f}h "
-                              f"at max ${max_price:.3f}/GB/h")
+                    logger.info("🛒 %s requested %sGB for %.1fh at max $%.3f/GB/h",
+                                self.agent_id, space_needed, duration, max_price)
                 else:
-                    logger.error(f"Failed to send request {request_id}")
+                    logger.error("Failed to send request %s", request_id)
                 
                 # Wait for next request
-                wait_time = random.uniform(*self.request_interval)
+                wait_time = rand_pool.uniform(*self.request_interval)
                 await asyncio.sleep(wait_time)
                 
             except Exception as e:
-                logger.error(f"Error in buyer request behavior: {e}")
+                logger.error("Error in buyer request behavior: %s", e)
                 await asyncio.sleep(1)
     
     async def response_handler(self):
         """Handle responses from the broker"""
-        while self.running:
-            try:
-                msg = await self.message_bus.receive_message(self.agent_id, timeout=1.0)
-                if msg:
+        try:
+            while (msg := await self.message_bus.next_message(self.agent_id)) is not None:
+                try:
                     await self.process_response(msg)
-            except Exception as e:
-                logger.error(f"Error in buyer response handler: {e}")
-                await asyncio.sleep(0.1)
+                except Exception as e:
+                    logger.error("Error in buyer response handler: %s", e)
+        finally:
+            self.drained.set()
     
-    async def process_response(self, msg: Dict[str, Any]):
+    async def process_response(self, msg: Envelope):
         """Process response message"""
         try:
-            message_body = msg['body']
+            message_body = msg.body
             msg_type = message_body.get('type')
             
             if msg_type == 'storage_response':
@@ -368,7 +715,7 @@ class BuyerAgent:
                 
                 if request_id in self.pending_requests:
                     original_request = self.pending_requests[request_id]
-                    response_time = time.time() - original_request.timestamp
+                    response_time = (_now() - original_request.timestamp) / NS_PER_S
                     
                     if response['status'] == 'success':
                         # Successful allocation
@@ -379,67 +726,81 @@ class BuyerAgent:
                         self.stats['total_spent'] += contract.total_cost
                         self.stats['total_storage_used'] += contract.space_gb
                         
-                        global_metrics.record_request(True, response_time)
-                        global_metrics.record_contract(contract)
+                        self.metrics.record_request(True)
+                        self.local_metrics.record_response_time(response_time)
+                        self.metrics.record_contract(contract)
                         
                         # Schedule contract completion tracking
-                        asyncio.create_task(self.track_contract_completion(contract))
+                        heapq.heappush(self.completion_heap, (contract.end_time, contract.contract_id))
                         
-                        logger.info(f"✅ {self.agent_id} contract {contract.contract_id} accepted - "
-                                  f"Cost: ${contract.total_cost:.2f}, Duration: {contract.duration_hours:.1f}h")
+                        logger.info("✅ %s contract %s accepted - Cost: $%.2f, Duration: %.1fh",
+                                    self.agent_id, contract.contract_id, contract.total_cost, contract.duration_hours)
                     else:
                         # Request rejected
                         self.stats['requests_failed'] += 1
                         reason = response.get('reason', 'unknown')
                         
-                        global_metrics.record_request(False, response_time)
+                        self.metrics.record_request(False)
+                        self.local_metrics.record_response_time(response_time)
                         
-                        logger.info(f"❌ {self.agent_id} request {request_id} rejected: {reason}")
+                        logger.info("❌ %s request %s rejected: %s", self.agent_id, request_id, reason)
                     
-                    # Update average response time
+                    # Update average response time (running mean)
                     total_responses = self.stats['requests_successful'] + self.stats['requests_failed']
                     if total_responses > 0:
-                        self.stats['avg_response_time'] = (
-                            (self.stats['avg_response_time'] * (total_responses - 1) + response_time) 
-                            / total_responses
-                        )
+                        avg = self.stats['avg_response_time']
+                        self.stats['avg_response_time'] = avg + (response_time - avg) / total_responses
                     
-                    # Remove from pending
+                    # Remove from pending and recycle the request object
                     del self.pending_requests[request_id]
+                    if len(self.request_pool) < REQUEST_POOL_SIZE:
+                        self.request_pool.append(original_request)
         
         except Exception as e:
-            logger.error(f"Error processing response: {e}")
+            logger.error("Error processing response: %s", e)
     
-    async def track_contract_completion(self, contract: StorageContract):
-        """Track when a contract completes"""
-        try:
-            # Wait for contract to complete
-            wait_time = contract.end_time - time.time()
-            if wait_time > 0:
-                await asyncio.sleep(wait_time)
-            
-            # Mark as completed
-            if contract.contract_id in self.active_contracts:
-                del self.active_contracts[contract.contract_id]
-                self.completed_contracts.append(contract)
-                self.stats['contracts_completed'] += 1
+    async def completion_tracker(self):
+        """Track when contracts complete, for all of the buyer's contracts at once"""
+        completion_heap = self.completion_heap
+        while self.running:
+            try:
+                current_time = _now()
                 
-                global_metrics.record_contract(contract, completed=True)
+                # Pop only the contracts that have ended
+                while completion_heap and completion_heap[0][0] <= current_time:
+                    _, contract_id = heapq.heappop(completion_heap)
+                    contract = self.active_contracts.pop(contract_id, None)
+                    if contract is None:
+                        continue
+                    
+                    # Mark as completed
+                    self.completed_contracts.append(contract)
+                    self.stats['contracts_completed'] += 1
+                    
+                    self.metrics.record_contract(contract, completed=True)
+                    
+                    logger.info("📦 %s contract %s completed", self.agent_id, contract_id)
                 
-                logger.info(f"📦 {self.agent_id} contract {contract.contract_id} completed")
-        
-        except Exception as e:
-            logger.error(f"Error tracking contract completion: {e}")
+                # Wake at the next completion, checking at least every 2 seconds so stop() is noticed
+                next_completion = (completion_heap[0][0] - current_time) / NS_PER_S if completion_heap else 2
+                await asyncio.sleep(min(max(next_completion, 0.1), 2))
+            
+            except Exception as e:
+                logger.error("Error tracking contract completion: %s", e)
+                await asyncio.sleep(1)
 
 class StorageProviderAgent:
     """Enhanced storage provider with dynamic pricing and reputation"""
     
     def __init__(self, agent_id: str, broker_id: str, message_bus: MessageBus,
                  total_space_gb: int, base_price_per_gb_hour: float = 0.5,
-                 failure_probability: float = 0.1):
+                 failure_probability: float = 0.1,
+                 metrics: Optional[SimulationMetrics] = None):
         self.agent_id = agent_id
         self.broker_id = broker_id
         self.message_bus = message_bus
+        self.metrics = metrics if metrics is not None else message_bus.metrics
+        self.local_metrics = self.metrics.local_shard()  # Provider samples, merged in bulk
         self.total_space_gb = total_space_gb
         self.available_space_gb = total_space_gb
         self.base_price_per_gb_hour = base_price_per_gb_hour
@@ -447,9 +808,17 @@ class StorageProviderAgent:
         
         # Dynamic pricing based on utilization
         self.current_price_per_gb_hour = base_price_per_gb_hour
+        self.utilization = 0.0  # Recomputed only when space is allocated or released
+        self.pricing_band = None  # 0 low (< 30%), 1 normal, 2 high (> 80%) utilization
+        self.band_prices = (
+            base_price_per_gb_hour * 0.8,  # Low utilization discount
+            base_price_per_gb_hour,
+            base_price_per_gb_hour * 1.5,  # High utilization premium
+        )
         
         # Contract management
         self.active_contracts = {}
+        self.expiry_heap = []  # (end_time, contract_id) min-heap of active contracts
         self.completed_contracts = []
         
         # Reputation system
@@ -469,8 +838,10 @@ class StorageProviderAgent:
             'current_reputation': self.reputation
         }
         
-        self.start_time = time.time()
+        self.start_time = _now()
         self.running = False
+        self.drained = asyncio.Event()  # Set once the request handler has exited
+        self.started = asyncio.Event()  # Set once start() has finished
         
         message_bus.register_agent(agent_id)
     
@@ -493,13 +864,28 @@ class StorageProviderAgent:
         # Start dynamic pricing
         asyncio.create_task(self.dynamic_pricing())
         
-        logger.info(f"💾 Provider {self.agent_id} started: {self.total_space_gb}GB at "
-                   f"${self.current_price_per_gb_hour:.3f}/GB/h")
+        logger.info("💾 Provider %s started: %sGB at $%.3f/GB/h",
+                    self.agent_id, self.total_space_gb, self.current_price_per_gb_hour)
+        self.started.set()
     
     async def stop(self):
         """Stop provider agent"""
         self.running = False
-        logger.info(f"💾 Provider {self.agent_id} stopped")
+        self.message_bus.close_mailbox(self.agent_id)
+        logger.info("💾 Provider %s stopped", self.agent_id)
+    
+    async def drain(self):
+        """Wait until the request handler has finished processing"""
+        await self.drained.wait()
+    
+    async def run(self, stop_event: asyncio.Event):
+        """Run the agent until stop_event is set, then stop and drain it"""
+        await self.start()
+        try:
+            await stop_event.wait()
+        finally:
+            await self.stop()
+        await self.drain()
     
     async def register_with_broker(self):
         """Register provider capabilities with broker"""
@@ -509,7 +895,7 @@ class StorageProviderAgent:
             available_space_gb=self.available_space_gb,
             reputation=self.reputation,
             price_per_gb_hour=self.current_price_per_gb_hour,
-            last_seen=time.time(),
+            last_seen=_now(),
             success_count=self.success_count,
             failure_count=self.failure_count,
             response_time_avg=0.1
@@ -517,27 +903,27 @@ class StorageProviderAgent:
         
         message = {
             'type': 'provider_registration',
-            'provider_info': asdict(provider_info)
+            'provider_info': fast_asdict(provider_info)
         }
         
         await self.message_bus.send_message(self.agent_id, self.broker_id, message)
-        logger.debug(f"Provider {self.agent_id} registered with broker")
+        logger.debug("Provider %s registered with broker", self.agent_id)
     
     async def request_handler(self):
         """Handle allocation requests from broker"""
-        while self.running:
-            try:
-                msg = await self.message_bus.receive_message(self.agent_id, timeout=1.0)
-                if msg:
+        try:
+            while (msg := await self.message_bus.next_message(self.agent_id)) is not None:
+                try:
                     await self.process_allocation_request(msg)
-            except Exception as e:
-                logger.error(f"Error in provider request handler: {e}")
-                await asyncio.sleep(0.1)
+                except Exception as e:
+                    logger.error("Error in provider request handler: %s", e)
+        finally:
+            self.drained.set()
     
-    async def process_allocation_request(self, msg: Dict[str, Any]):
+    async def process_allocation_request(self, msg: Envelope):
         """Process allocation request"""
         try:
-            message_body = msg['body']
+            message_body = msg.body
             
             if message_body.get('type') == 'allocation_request':
                 contract_data = message_body['contract']
@@ -546,7 +932,7 @@ class StorageProviderAgent:
                 self.stats['requests_received'] += 1
                 
                 # Simulate processing time
-                await asyncio.sleep(random.uniform(0.05, 0.2))
+                await asyncio.sleep(rand_pool.uniform(0.05, 0.2))
                 
                 # Decision making
                 space_needed = contract_data['space_gb']
@@ -556,7 +942,9 @@ class StorageProviderAgent:
                     # Accept contract
                     contract = StorageContract(**contract_data)
                     self.active_contracts[contract.contract_id] = contract
+                    heapq.heappush(self.expiry_heap, (contract.end_time, contract.contract_id))
                     self.available_space_gb -= space_needed
+                    self.update_utilization()
                     self.stats['requests_accepted'] += 1
                     self.stats['total_earnings'] += contract.total_cost
                     
@@ -571,15 +959,15 @@ class StorageProviderAgent:
                         'provider_id': self.agent_id
                     }
                     
-                    logger.info(f"🟢 Provider {self.agent_id} accepted contract {contract.contract_id} "
-                              f"({space_needed}GB, ${contract.total_cost:.2f})")
+                    logger.info("🟢 Provider %s accepted contract %s (%sGB, $%.2f)",
+                                self.agent_id, contract.contract_id, space_needed, contract.total_cost)
                 else:
                     # Reject contract
                     self.stats['requests_rejected'] += 1
                     
                     # Update reputation for rejection
                     self.update_reputation(False)
-                    global_metrics.record_network_event('provider_failure')
+                    self.metrics.record_network_event('provider_failure')
                     
                     reason = ('insufficient_space' if self.available_space_gb < space_needed 
                              else 'provider_failure')
@@ -592,13 +980,13 @@ class StorageProviderAgent:
                         'provider_id': self.agent_id
                     }
                     
-                    logger.info(f"🔴 Provider {self.agent_id} rejected request {request_id}: {reason}")
+                    logger.info("🔴 Provider %s rejected request %s: %s", self.agent_id, request_id, reason)
                 
                 # Send response
-                await self.message_bus.send_message(self.agent_id, msg['from'], response)
+                await self.message_bus.send_message(self.agent_id, msg.sender, response)
         
         except Exception as e:
-            logger.error(f"Error processing allocation request: {e}")
+            logger.error("Error processing allocation request: %s", e)
     
     def can_fulfill_request(self, space_needed: int) -> bool:
         """Determine if provider can fulfill request"""
@@ -607,7 +995,7 @@ class StorageProviderAgent:
             return False
         
         # Simulate random failures
-        if random.random() < self.failure_probability:
+        if rand_pool.random() < self.failure_probability:
             return False
         
         return True
@@ -624,45 +1012,52 @@ class StorageProviderAgent:
         self.stats['current_reputation'] = self.reputation
         
         # Record metrics
-        global_metrics.record_provider_metrics(
-            self.get_utilization(), 
+        self.local_metrics.record_provider_metrics(
+            self.utilization, 
             self.reputation,
             self.stats['total_earnings']
         )
     
+    def update_utilization(self):
+        """Recompute the cached utilization after available space changed"""
+        self.utilization = (self.total_space_gb - self.available_space_gb) / self.total_space_gb
+    
     def get_utilization(self) -> float:
-        """Calculate current utilization"""
-        return (self.total_space_gb - self.available_space_gb) / self.total_space_gb
+        """Current utilization (cached)"""
+        return self.utilization
     
     async def contract_manager(self):
         """Manage active contracts and release space when expired"""
+        expiry_heap = self.expiry_heap
         while self.running:
             try:
-                current_time = time.time()
-                completed_contracts = []
+                current_time = _now()
                 
-                for contract_id, contract in self.active_contracts.items():
-                    if current_time >= contract.end_time:
-                        # Release space
-                        self.available_space_gb += contract.space_gb
-                        self.stats['contracts_completed'] += 1
-                        
-                        # Move to completed
-                        contract.status = 'completed'
-                        self.completed_contracts.append(contract)
-                        completed_contracts.append(contract_id)
-                        
-                        logger.info(f"📦 Provider {self.agent_id} completed contract {contract_id} "
-                                  f"- Released {contract.space_gb}GB")
-                
-                # Remove completed contracts
-                for contract_id in completed_contracts:
-                    del self.active_contracts[contract_id]
+                # Pop only the contracts that have expired
+                while expiry_heap and expiry_heap[0][0] <= current_time:
+                    _, contract_id = heapq.heappop(expiry_heap)
+                    contract = self.active_contracts.pop(contract_id, None)
+                    if contract is None:
+                        continue
+                    
+                    # Release space
+                    self.available_space_gb += contract.space_gb
+                    self.update_utilization()
+                    self.stats['contracts_completed'] += 1
+                    
+                    # Move to completed
+                    contract.status = 'completed'
+                    self.completed_contracts.append(contract)
+                    
+                    logger.info("📦 Provider %s completed contract %s - Released %sGB",
+                                self.agent_id, contract_id, contract.space_gb)
                 
-                await asyncio.sleep(2)  # Check every 2 seconds
+                # Wake at the next expiry, checking at least every 2 seconds so stop() is noticed
+                next_expiry = (expiry_heap[0][0] - current_time) / NS_PER_S if expiry_heap else 2
+                await asyncio.sleep(min(max(next_expiry, 0.1), 2))
             
             except Exception as e:
-                logger.error(f"Error in contract manager: {e}")
+                logger.error("Error in contract manager: %s", e)
                 await asyncio.sleep(1)
     
     async def status_updater(self):
@@ -670,8 +1065,8 @@ class StorageProviderAgent:
         while self.running:
             try:
                 # Update statistics
-                self.stats['uptime'] = time.time() - self.start_time
-                utilization = self.get_utilization()
+                self.stats['uptime'] = (_now() - self.start_time) / NS_PER_S
+                utilization = self.utilization
                 self.stats['avg_utilization'] = utilization
                 
                 # Send status update
@@ -685,55 +1080,144 @@ class StorageProviderAgent:
                     'active_contracts': len(self.active_contracts)
                 }
                 
-                await self.message_bus.send_message(self.agent_id, self.broker_id, status)
+                # Coalesced with the other providers' updates into one broker message
+                self.message_bus.queue_batched(self.broker_id, status)
                 
                 await asyncio.sleep(5)  # Update every 5 seconds
             
             except Exception as e:
-                logger.error(f"Error in status updater: {e}")
+                logger.error("Error in status updater: %s", e)
                 await asyncio.sleep(1)
     
     async def dynamic_pricing(self):
         """Adjust pricing based on utilization and demand"""
         while self.running:
             try:
-                utilization = self.get_utilization()
+                utilization = self.utilization
                 
-                # Adjust price based on utilization
-                if utilization > 0.8:  # High utilization
-                    self.current_price_per_gb_hour = min(
-                        self.base_price_per_gb_hour * 1.5, 
-                        self.base_price_per_gb_hour * 2.0
-                    )
-                elif utilization < 0.3:  # Low utilization
-                    self.current_price_per_gb_hour = max(
-                        self.base_price_per_gb_hour * 0.8,
-                        self.base_price_per_gb_hour * 0.5
-                    )
-                else:  # Normal utilization
-                    self.current_price_per_gb_hour = self.base_price_per_gb_hour
+                # Adjust price only when utilization moved to another band
+                band = 2 if utilization > 0.8 else 0 if utilization < 0.3 else 1
+                if band != self.pricing_band:
+                    self.pricing_band = band
+                    self.current_price_per_gb_hour = self.band_prices[band]
                 
                 await asyncio.sleep(10)  # Adjust every 10 seconds
             
             except Exception as e:
-                logger.error(f"Error in dynamic pricing: {e}")
+                logger.error("Error in dynamic pricing: %s", e)
                 await asyncio.sleep(1)
 
+# Selection confidence 1 / (1 + exp(-0.1 * (n - 20))) for n = 0..40 interactions,
+# so providers with little history cannot win on a few lucky outcomes
+CONFIDENCE_LUT = 1.0 / (1.0 + np.exp(-0.1 * (np.arange(41) - 20)))
+CONFIDENCE_CAP = len(CONFIDENCE_LUT) - 1
+
+# Provider score weights: reputation 40% (of the 0-10 scale, folded in), price 30%,
+# availability 20% and success rate 10%
+W_REPUTATION = 0.4 / 10.0
+W_PRICE = 0.3
+W_AVAILABILITY = 0.2
+W_SUCCESS = 0.1
+
+# Selection eligibility: minimum reputation and maximum time since the last status
+MIN_REPUTATION = 1.0
+LIVENESS_NS = 30 * NS_PER_S
+
+class ProviderTable:
+    """Struct-of-arrays copy of the provider fields used for selection"""
+    
+    COLUMNS = ('avail', 'price', 'rep', 'seen', 'partial', 'confidence')
+    
+    def __init__(self, capacity: int = 16):
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}  # provider_id -> row index
+        for name in self.COLUMNS:
+            setattr(self, name, np.zeros(capacity))
+    
+    def sync(self, provider: ProviderInfo, last_seen: int):
+        """Insert or refresh the row of a provider"""
+        row = self.rows.get(provider.agent_id)
+        if row is None:
+            row = len(self.ids)
+            if row == len(self.avail):
+                self._grow()
+            self.rows[provider.agent_id] = row
+            self.ids.append(provider.agent_id)
+        self.avail[row] = provider.available_space_gb
+        self.price[row] = provider.price_per_gb_hour
+        self.rep[row] = provider.reputation
+        self.seen[row] = last_seen
+        
+        # Request-independent part of the score
+        attempts = provider.success_count + provider.failure_count
+        self.partial[row] = (provider.reputation * W_REPUTATION
+                             + (provider.available_space_gb / provider.total_space_gb) * W_AVAILABILITY
+                             + (provider.success_count / max(attempts, 1)) * W_SUCCESS)
+        self.confidence[row] = CONFIDENCE_LUT[min(attempts, CONFIDENCE_CAP)]
+    
+    def remove(self, provider_id: str):
+        """Remove a provider by moving the last row into its slot"""
+        row = self.rows.pop(provider_id, None)
+        if row is None:
+            return
+        last = len(self.ids) - 1
+        last_id = self.ids.pop()
+        if row != last:
+            self.ids[row] = last_id
+            self.rows[last_id] = row
+            for name in self.COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+    
+    def pick(self, space_gb: int, max_price: float, now: int) -> Optional[str]:
+        """Best scoring eligible provider id, or None"""
+        n = len(self.ids)
+        if n == 0:
+            return None
+        price = self.price[:n]
+        
+        # Enough space, affordable, minimum reputation and seen in the last 30 seconds
+        mask = ((self.avail[:n] >= space_gb) & (price <= max_price) & (self.rep[:n] >= MIN_REPUTATION)
+                & (now - self.seen[:n] < LIVENESS_NS))
+        if not mask.any():
+            return None
+        
+        # Only the price term (lower is better) depends on the request
+        scores = (self.partial[:n] + (1.0 - price / max_price) * W_PRICE) * self.confidence[:n]
+        return self.ids[int(np.argmax(np.where(mask, scores, -np.inf)))]
+    
+    def _grow(self):
+        capacity = 2 * len(self.avail)
+        for name in self.COLUMNS:
+            column = np.zeros(capacity)
+            column[:len(self.ids)] = getattr(self, name)
+            setattr(self, name, column)
+
+# Network replies queued in one burst are posted together once this many are waiting
+OUTBOX_SIZE = 50
+
 class IntermediaryNetworkAgent:
     """Enhanced network broker with reputation-based provider selection"""
     
     def __init__(self, agent_id: str, message_bus: MessageBus, 
-                 corruption_probability: float = 0.05):
+                 corruption_probability: float = 0.05,
+                 metrics: Optional[SimulationMetrics] = None):
         self.agent_id = agent_id
         self.message_bus = message_bus
+        self.metrics = metrics if metrics is not None else message_bus.metrics
         self.corruption_probability = corruption_probability
         
         # Provider management
         self.providers = {}  # provider_id -> ProviderInfo
         self.provider_last_seen = {}
+        self.liveness_heap = []  # (last_seen, provider_id) min-heap, stale entries skipped lazily
+        self.provider_table = ProviderTable()  # Selection columns mirrored from self.providers
         
         # Request tracking
-        self.pending_allocations = {}  # request_id -> (buyer_id, request, selected_provider)
+        self.pending_allocations = {}  # request_id -> (buyer_id, request, selected_provider, contract)
+        
+        # Outbound messages of the current burst, posted by one loop callback
+        self.outbox = []  # (to_agent, message)
         
         # Statistics
         self.stats = {
@@ -746,7 +1230,19 @@ class IntermediaryNetworkAgent:
             'avg_response_time': 0.0
         }
         
+        # Message type -> handler, looked up once per message
+        self.dispatch = {
+            'provider_registration': self.handle_provider_registration,
+            'storage_request': self.handle_storage_request,
+            'allocation_response': self.handle_allocation_response,
+            'status_update': self.handle_status_update,
+            'batched': self.handle_batched,
+        }
+        
         self.running = False
+        self.provider_registered = asyncio.Event()  # Set whenever a registration is processed
+        self.drained = asyncio.Event()  # Set once the message handler has exited
+        self.started = asyncio.Event()  # Set once start() has finished
         message_bus.register_agent(agent_id)
     
     async def start(self):
@@ -759,279 +1255,250 @@ class IntermediaryNetworkAgent:
         # Start provider management
         asyncio.create_task(self.provider_manager())
         
-        logger.info(f"🏢 Network {self.agent_id} started")
+        logger.info("🏢 Network %s started", self.agent_id)
+        self.started.set()
     
     async def stop(self):
         """Stop network agent"""
         self.running = False
-        logger.info(f"🏢 Network {self.agent_id} stopped")
+        self.message_bus.close_mailbox(self.agent_id)
+        logger.info("🏢 Network %s stopped", self.agent_id)
+    
+    async def drain(self):
+        """Wait until the message handler has finished processing"""
+        await self.drained.wait()
+    
+    async def run(self, stop_event: asyncio.Event):
+        """Run the agent until stop_event is set, then stop and drain it"""
+        await self.start()
+        try:
+            await stop_event.wait()
+        finally:
+            await self.stop()
+        await self.drain()
+    
+    async def wait_for_providers(self, count: int):
+        """Wait until at least count providers are registered"""
+        while len(self.providers) < count:
+            self.provider_registered.clear()
+            await self.provider_registered.wait()
     
     async def message_handler(self):
         """Handle all incoming messages"""
-        while self.running:
-            try:
-                msg = await self.message_bus.receive_message(self.agent_id, timeout=1.0)
-                if msg:
+        try:
+            while (msg := await self.message_bus.next_message(self.agent_id)) is not None:
+                try:
                     await self.process_message(msg)
-            except Exception as e:
-                logger.error(f"Error in network message handler: {e}")
-                await asyncio.sleep(0.1)
+                except Exception as e:
+                    logger.error("Error in network message handler: %s", e)
+        finally:
+            self.drained.set()
     
-    async def process_message(self, msg: Dict[str, Any]):
-        """Process incoming message based on type"""
-        try:
-            message_body = msg['body']
-            msg_type = message_body.get('type')
-            
-            if msg_type == 'provider_registration':
-                await self.handle_provider_registration(msg)
-            elif msg_type == 'storage_request':
-                await self.handle_storage_request(msg)
-            elif msg_type == 'allocation_response':
-                await self.handle_allocation_response(msg)
-            elif msg_type == 'status_update':
-                await self.handle_status_update(msg)
+    def send(self, to_agent: str, message: Dict[str, Any]):
+        """Queue an outbound message; the burst is posted once the handler yields"""
+        self.outbox.append((to_agent, message))
+        if len(self.outbox) >= OUTBOX_SIZE:
+            self.flush_outbox()
+        elif len(self.outbox) == 1:
+            asyncio.get_running_loop().call_soon(self.flush_outbox)
+    
+    def flush_outbox(self):
+        """Post every queued outbound message"""
+        outbox, self.outbox = self.outbox, []
+        for to_agent, message in outbox:
+            self.message_bus.post(self.agent_id, to_agent, message)
+    
+    async def process_message(self, msg: Envelope):
+        """Process incoming message based on type (errors propagate to message_handler)"""
+        msg_type = msg.body.get('type')
+        handler = self.dispatch.get(msg_type)
+        if handler is None:
+            logger.warning("Unknown message type: %s", msg_type)
+            return
+        await handler(msg)
+    
+    async def handle_batched(self, msg: Envelope):
+        """Unpack a batch of coalesced messages from one sender
+        
+        Only the newest status update of each provider in the batch is
+        applied; older ones would be overwritten straight away.
+        """
+        latest_status = {}  # provider_id -> newest status_update body
+        for item in msg.body['items']:
+            if item.get('type') == 'status_update':
+                latest_status[item['provider_id']] = item
             else:
-                logger.warning(f"Unknown message type: {msg_type}")
+                await self.process_message(replace(msg, body=item))
         
-        except Exception as e:
-            logger.error(f"Error processing message: {e}")
+        for status in latest_status.values():
+            await self.handle_status_update(replace(msg, body=status))
     
-    async def handle_provider_registration(self, msg: Dict[str, Any]):
+    async def handle_provider_registration(self, msg: Envelope):
         """Handle provider registration"""
         try:
-            provider_info = ProviderInfo(**msg['body']['provider_info'])
+            provider_info = ProviderInfo(**msg.body['provider_info'])
+            was_new = provider_info.agent_id not in self.providers
             self.providers[provider_info.agent_id] = provider_info
-            self.provider_last_seen[provider_info.agent_id] = time.time()
+            last_seen = _now()
+            self.provider_last_seen[provider_info.agent_id] = last_seen
+            heapq.heappush(self.liveness_heap, (last_seen, provider_info.agent_id))
+            self.provider_table.sync(provider_info, last_seen)
             
-            if provider_info.agent_id not in [p.agent_id for p in self.providers.values()]:
+            if was_new:
                 self.stats['total_providers_registered'] += 1
+            self.provider_registered.set()
             
             self.stats['active_providers'] = len(self.providers)
             
-            logger.info(f"📋 Network registered provider {provider_info.agent_id}")
+            logger.info("📋 Network registered provider %s", provider_info.agent_id)
         
         except Exception as e:
-            logger.error(f"Error handling provider registration: {e}")
+            logger.error("Error handling provider registration: %s", e)
     
-    async def handle_storage_request(self, msg: Dict[str, Any]):
+    async def handle_storage_request(self, msg: Envelope):
         """Handle storage request from buyer"""
         try:
-            request = StorageRequest(**msg['body']['request'])
-            buyer_id = msg['from']
+            request = StorageRequest(**msg.body['request'])
+            buyer_id = msg.sender
             
             self.stats['requests_processed'] += 1
             
-            logger.info(f"🏢 Network processing request {request.request_id} from {buyer_id}")
+            logger.debug("🏢 Network processing request %s from %s", request.request_id, buyer_id)
             
             # Select provider using reputation-based algorithm
             selected_provider = self.select_provider(request)
             
             if selected_provider:
                 # Calculate contract details
-                total_cost = (request.space_gb * request.duration_hours * 
-                            selected_provider.price_per_gb_hour)
-                
-                contract = StorageContract(
-                    contract_id=f"CONT-{int(time.time())}-{random.randint(1000, 9999)}",
-                    buyer_id=request.buyer_id,
-                    provider_id=selected_provider.agent_id,
-                    space_gb=request.space_gb,
-                    duration_hours=request.duration_hours,
-                    price_per_gb_hour=selected_provider.price_per_gb_hour,
-                    total_cost=total_cost,
-                    start_time=time.time(),
-                    end_time=time.time() + (request.duration_hours * 3600),
-                    status='pending'
-                )
+                contract = StorageContract.from_request(request, selected_provider)
                 
                 # Store pending allocation
-                self.pending_allocations[request.request_id] = (buyer_id, request, selected_provider)
+                self.pending_allocations[request.request_id] = (buyer_id, request, selected_provider, contract)
                 
                 # Send allocation request to provider
                 allocation_message = {
                     'type': 'allocation_request',
                     'request_id': request.request_id,
-                    'contract': asdict(contract)
+                    'contract': fast_asdict(contract)
                 }
                 
-                await self.message_bus.send_message(
-                    self.agent_id, selected_provider.agent_id, allocation_message
-                )
+                self.send(selected_provider.agent_id, allocation_message)
                 
-                logger.info(f"🏢 Network forwarded request {request.request_id} to "
-                          f"provider {selected_provider.agent_id}")
+                logger.debug("🏢 Network forwarded request %s to provider %s",
+                             request.request_id, selected_provider.agent_id)
             else:
                 # No suitable provider
-                await self.send_failure_response(buyer_id, request.request_id, 
-                                               "no_suitable_provider")
+                self.send_failure_response(buyer_id, request.request_id, "no_suitable_provider")
                 self.stats['failed_allocations'] += 1
         
         except Exception as e:
-            logger.error(f"Error handling storage request: {e}")
+            logger.error("Error handling storage request: %s", e)
     
     def select_provider(self, request: StorageRequest) -> Optional[ProviderInfo]:
         """Select best provider using weighted reputation and capacity algorithm"""
         try:
-            current_time = time.time()
-            suitable_providers = []
-            
-            for provider in self.providers.values():
-                # Check if provider meets requirements
-                if (provider.available_space_gb >= request.space_gb and
-                    provider.price_per_gb_hour <= request.max_price_per_gb_hour and
-                    provider.reputation >= 1.0 and  # Minimum reputation
-                    current_time - self.provider_last_seen.get(provider.agent_id, 0) < 30):
-                    suitable_providers.append(provider)
-            
-            if not suitable_providers:
-                return None
-            
-            # Score providers based on multiple factors
-            def calculate_score(provider: ProviderInfo) -> float:
-                # Reputation weight (40%)
-                reputation_score = (provider.reputation / 10.0) * 0.4
-                
-                # Price weight (30%) - lower price is better
-                max_price = request.max_price_per_gb_hour
-                price_score = (1.0 - (provider.price_per_gb_hour / max_price)) * 0.3
-                
-                # Availability weight (20%) - more available space is better
-                availability_score = (provider.available_space_gb / provider.total_space_gb) * 0.2
-                
-                # Success rate weight (10%)
-                total_attempts = provider.success_count + provider.failure_count
-                success_rate = (provider.success_count / max(total_attempts, 1)) * 0.1
-                
-                return reputation_score + price_score + availability_score + success_rate
-            
-            # Select provider with highest score
-            suitable_providers.sort(key=calculate_score, reverse=True)
-            return suitable_providers[0]
+            # Filter and score every provider in one vectorized pass
+            provider_id = self.provider_table.pick(request.space_gb, request.max_price_per_gb_hour, _now())
+            return self.providers[provider_id] if provider_id is not None else None
         
         except Exception as e:
-            logger.error(f"Error selecting provider: {e}")
+            logger.error("Error selecting provider: %s", e)
             return None
     
-    async def handle_allocation_response(self, msg: Dict[str, Any]):
+    async def handle_allocation_response(self, msg: Envelope):
         """Handle allocation response from provider"""
         try:
-            response = msg['body']
+            response = msg.body
             request_id = response['request_id']
             
-            if request_id in self.pending_allocations:
-                buyer_id, original_request, selected_provider = self.pending_allocations[request_id]
-                
-                # Calculate response time
-                response_time = time.time() - original_request.timestamp
+            # Remove from pending
+            entry = self.pending_allocations.pop(request_id, None)
+            if entry is None:
+                return
+            buyer_id, original_request, selected_provider, contract = entry
+            stats = self.stats
+            
+            # Calculate response time
+            response_time = (_now() - original_request.timestamp) / NS_PER_S
+            provider = self.providers.get(selected_provider.agent_id)
+            
+            if response['status'] == 'accepted':
+                # Update provider reputation for success
+                if provider is not None:
+                    provider.success_count += 1
+                    provider.reputation = min(provider.reputation * 1.01, 10.0)
+                    self.provider_table.sync(provider, self.provider_last_seen[provider.agent_id])
                 
-                if response['status'] == 'accepted':
-                    # Update provider reputation for success
-                    if selected_provider.agent_id in self.providers:
-                        provider = self.providers[selected_provider.agent_id]
-                        provider.success_count += 1
-                        provider.reputation = min(provider.reputation * 1.01, 10.0)
+                # Check for contract corruption
+                corrupted = rand_pool.random() < self.corruption_probability
+                if corrupted:
+                    stats['corrupted_contracts'] += 1
+                    self.metrics.record_network_event('corruption')
                     
-                    # Check for contract corruption
-                    corrupted = random.random() < self.corruption_probability
-                    if corrupted:
-                        self.stats['corrupted_contracts'] += 1
-                        global_metrics.record_network_event('corruption')
-                        
-                        final_response = {
-                            'type': 'storage_response',
-                            'response': {
-                                'request_id': request_id,
-                                'status': 'failure',
-                                'reason': 'network_corruption'
-                            }
-                        }
-                        
-                        logger.warning(f"⚠️ Network corrupted contract for request {request_id}")
-                    else:
-                        contract_data = {
-                            'contract_id': response['contract_id'],
-                            'buyer_id': original_request.buyer_id,
-                            'provider_id': selected_provider.agent_id,
-                            'space_gb': original_request.space_gb,
-                            'duration_hours': original_request.duration_hours,
-                            'price_per_gb_hour': selected_provider.price_per_gb_hour,
-                            'total_cost': original_request.space_gb * original_request.duration_hours * selected_provider.price_per_gb_hour,
-                            'start_time': time.time(),
-                            'end_time': time.time() + (original_request.duration_hours * 3600),
-                            'status': 'active'
-                        }
-                        
-                        final_response = {
-                            'type': 'storage_response',
-                            'response': {
-                                'request_id': request_id,
-                                'status': 'success',
-                                'contract': contract_data
-                            }
-                        }
+                    final_response = self.failure_response(request_id, 'network_corruption')
                     
-                    self.stats['successful_allocations'] += 1
+                    logger.warning("⚠️ Network corrupted contract for request %s", request_id)
                 else:
-                    # Update provider reputation for failure
-                    if selected_provider.agent_id in self.providers:
-                        provider = self.providers[selected_provider.agent_id]
-                        provider.failure_count += 1
-                        provider.reputation = max(provider.reputation * 0.99, 0.1)
-                    
+                    # The buyer gets the same contract terms the provider accepted
+                    contract.status = 'active'
                     final_response = {
                         'type': 'storage_response',
                         'response': {
                             'request_id': request_id,
-                            'status': 'failure',
-                            'reason': response.get('reason', 'provider_rejected')
+                            'status': 'success',
+                            'contract': fast_asdict(contract)
                         }
                     }
-                    
-                    self.stats['failed_allocations'] += 1
                 
-                # Send response to buyer
-                await self.message_bus.send_message(self.agent_id, buyer_id, final_response)
-                
-                # Update average response time
-                total_responses = self.stats['successful_allocations'] + self.stats['failed_allocations']
-                if total_responses > 0:
-                    self.stats['avg_response_time'] = (
-                        (self.stats['avg_response_time'] * (total_responses - 1) + response_time)
-                        / total_responses
-                    )
+                stats['successful_allocations'] += 1
+            else:
+                # Update provider reputation for failure
+                if provider is not None:
+                    provider.failure_count += 1
+                    provider.reputation = max(provider.reputation * 0.99, 0.1)
+                    self.provider_table.sync(provider, self.provider_last_seen[provider.agent_id])
                 
-                # Remove from pending
-                del self.pending_allocations[request_id]
+                final_response = self.failure_response(request_id, response.get('reason', 'provider_rejected'))
                 
-                logger.info(f"🏢 Network completed processing request {request_id} "
-                          f"in {response_time:.2f}s")
+                stats['failed_allocations'] += 1
+            
+            # Send response to buyer
+            self.send(buyer_id, final_response)
+            
+            # Update average response time (running mean)
+            total_responses = stats['successful_allocations'] + stats['failed_allocations']
+            avg = stats['avg_response_time']
+            stats['avg_response_time'] = avg + (response_time - avg) / total_responses
+            
+            logger.debug("🏢 Network completed processing request %s in %.2fs", request_id, response_time)
         
         except Exception as e:
-            logger.error(f"Error handling allocation response: {e}")
+            logger.error("Error handling allocation response: %s", e)
     
-    async def send_failure_response(self, buyer_id: str, request_id: str, reason: str):
+    # Constant part of every failure response, copied and completed per message
+    FAILURE_TEMPLATE = {'status': 'failure'}
+    
+    @classmethod
+    def failure_response(cls, request_id: str, reason: str) -> Dict[str, Any]:
+        """Storage response telling the buyer its request failed"""
+        response = cls.FAILURE_TEMPLATE.copy()
+        response['request_id'] = request_id
+        response['reason'] = reason
+        return {'type': 'storage_response', 'response': response}
+    
+    def send_failure_response(self, buyer_id: str, request_id: str, reason: str):
         """Send failure response to buyer"""
         try:
-            response = {
-                'type': 'storage_response',
-                'response': {
-                    'request_id': request_id,
-                    'status': 'failure',
-                    'reason': reason
-                }
-            }
-            
-            await self.message_bus.send_message(self.agent_id, buyer_id, response)
-            logger.info(f"🏢 Network sent failure response for {request_id}: {reason}")
+            self.send(buyer_id, self.failure_response(request_id, reason))
+            logger.info("🏢 Network sent failure response for %s: %s", request_id, reason)
         
         except Exception as e:
-            logger.error(f"Error sending failure response: {e}")
+            logger.error("Error sending failure response: %s", e)
     
-    async def handle_status_update(self, msg: Dict[str, Any]):
+    async def handle_status_update(self, msg: Envelope):
         """Handle status update from provider"""
         try:
-            status = msg['body']
+            status = msg.body
             provider_id = status['provider_id']
             
             if provider_id in self.providers:
@@ -1039,85 +1506,106 @@ class IntermediaryNetworkAgent:
                 provider.available_space_gb = status['available_space_gb']
                 provider.reputation = status['reputation']
                 provider.price_per_gb_hour = status['price_per_gb_hour']
-                provider.last_seen = time.time()
+                provider.last_seen = _now()
                 
-                self.provider_last_seen[provider_id] = time.time()
+                self.provider_last_seen[provider_id] = provider.last_seen
+                heapq.heappush(self.liveness_heap, (provider.last_seen, provider_id))
+                self.provider_table.sync(provider, provider.last_seen)
         
         except Exception as e:
-            logger.error(f"Error handling status update: {e}")
+            logger.error("Error handling status update: %s", e)
     
     async def provider_manager(self):
         """Manage provider lifecycle and cleanup"""
+        liveness_heap = self.liveness_heap
         while self.running:
             try:
-                current_time = time.time()
-                inactive_providers = []
-                
-                for provider_id, last_seen in self.provider_last_seen.items():
-                    if current_time - last_seen > 60:  # 60 second timeout
-                        inactive_providers.append(provider_id)
+                cutoff = _now() - 60 * NS_PER_S  # 60 second timeout
                 
-                for provider_id in inactive_providers:
-                    if provider_id in self.providers:
-                        del self.providers[provider_id]
+                # Pop only the entries older than the timeout; an entry is stale
+                # (skipped) when the provider was seen again after it was pushed
+                while liveness_heap and liveness_heap[0][0] < cutoff:
+                    last_seen, provider_id = heapq.heappop(liveness_heap)
+                    if self.provider_last_seen.get(provider_id) != last_seen:
+                        continue
+                    
+                    self.providers.pop(provider_id, None)
                     del self.provider_last_seen[provider_id]
-                    logger.info(f"🧹 Network removed inactive provider {provider_id}")
+                    self.provider_table.remove(provider_id)
+                    logger.info("🧹 Network removed inactive provider %s", provider_id)
                 
                 self.stats['active_providers'] = len(self.providers)
                 
                 await asyncio.sleep(15)  # Check every 15 seconds
             
             except Exception as e:
-                logger.error(f"Error in provider manager: {e}")
+                logger.error("Error in provider manager: %s", e)
                 await asyncio.sleep(1)
 
 async def run_single_simulation(duration: int = 60, 
                                num_buyers: int = 2, 
-                               num_providers: int = 3) -> Dict[str, Any]:
+                               num_providers: int = 3,
+                               seed: Optional[int] = None) -> Dict[str, Any]:
     """Run a single simulation iteration"""
-    logger.info(f"🚀 Starting simulation: {duration}s, {num_buyers} buyers, {num_providers} providers")
+    logger.info("🚀 Starting simulation: %ss, %s buyers, %s providers", duration, num_buyers, num_providers)
     
-    # Reset global metrics
-    global_metrics.reset()
+    # Fresh metrics for this run
+    sim_metrics = SimulationMetrics()
     
     # Create message bus
-    message_bus = MessageBus()
+    message_bus = MessageBus(sim_metrics)
     
     # Create network agent
-    network = IntermediaryNetworkAgent("network", message_bus, corruption_probability=0.03)
+    network = IntermediaryNetworkAgent("network", message_bus, corruption_probability=0.03,
+                                       metrics=sim_metrics)
     await network.start()
     
-    # Create provider agents
-    providers = []
-    for i in range(num_providers):
-        provider = StorageProviderAgent(
+    # Draw every agent parameter up front, one vectorized call per parameter
+    rng = np.random.default_rng(seed)
+    spaces = rng.integers(100, 300, num_providers, endpoint=True).tolist()
+    prices = rng.uniform(0.3, 0.9, num_providers).tolist()
+    failure_probs = rng.uniform(0.02, 0.12, num_providers).tolist()
+    budgets = rng.uniform(15.0, 40.0, num_buyers).tolist()
+    
+    # Create provider agents and start them together
+    providers = [
+        StorageProviderAgent(
             agent_id=f"provider{i}",
             broker_id="network",
             message_bus=message_bus,
-            total_space_gb=random.randint(100, 300),
-            base_price_per_gb_hour=random.uniform(0.3, 0.9),
-            failure_probability=random.uniform(0.02, 0.12)
+            total_space_gb=spaces[i],
+            base_price_per_gb_hour=prices[i],
+            failure_probability=failure_probs[i],
+            metrics=sim_metrics
         )
-        providers.append(provider)
-        await provider.start()
-        await asyncio.sleep(0.5)  # Staggered startup
-    
-    # Create buyer agents
-    buyers = []
-    for i in range(num_buyers):
-        buyer = BuyerAgent(
+        for i in range(num_providers)
+    ]
+    await asyncio.gather(*(provider.start() for provider in providers))
+    
+    # Buyers start once the network has received the registrations (they travel
+    # with simulated latency), instead of after fixed staggered sleeps
+    try:
+        await asyncio.wait_for(network.wait_for_providers(num_providers), timeout=5)
+    except asyncio.TimeoutError:
+        logger.warning("⚠️ Only %s/%s providers registered before buyers started",
+                       len(network.providers), num_providers)
+    
+    # Create buyer agents and start them together
+    buyers = [
+        BuyerAgent(
             agent_id=f"buyer{i}",
             broker_id="network",
             message_bus=message_bus,
             request_interval=(2.0, 8.0),
-            budget_per_hour=random.uniform(15.0, 40.0)
+            budget_per_hour=budgets[i],
+            metrics=sim_metrics
         )
-        buyers.append(buyer)
-        await buyer.start()
-        await asyncio.sleep(0.5)  # Staggered startup
+        for i in range(num_buyers)
+    ]
+    await asyncio.gather(*(buyer.start() for buyer in buyers))
     
     # Let simulation run
-    logger.info(f"⏱️ Simulation running for {duration} seconds...")
+    logger.info("⏱️ Simulation running for %s seconds...", duration)
     await asyncio.sleep(duration)
     
     # Stop all agents
@@ -1128,7 +1616,7 @@ async def run_single_simulation(duration: int = 60,
     await asyncio.sleep(2)
     
     # Collect comprehensive metrics
-    metrics = global_metrics.get_summary()
+    metrics = sim_metrics.get_summary()
     
     # Add agent-specific statistics
     metrics['network_stats'] = network.stats
@@ -1147,60 +1635,83 @@ async def run_single_simulation(duration: int = 60,
     
     return metrics
 
+def _run_iteration_sync(seed: int, duration: int, num_buyers: int, num_providers: int) -> Dict[str, Any]:
+    """Run one iteration on its own event loop (entry point for worker processes)"""
+    # Forked workers inherit the parent's random state, so every iteration reseeds
+    random.seed(seed)
+    rand_pool.seed(seed)
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(run_single_simulation(duration, num_buyers, num_providers, seed))
+
 async def run_monte_carlo_simulation(iterations: int = 5, 
                                    duration_per_iteration: int = 45,
                                    num_buyers: int = 2,
                                    num_providers: int = 3):
     """Run Monte Carlo simulation with comprehensive analysis"""
-    logger.info(f"🎯 Starting Monte Carlo simulation:")
-    logger.info(f"   Iterations: {iterations}")
-    logger.info(f"   Duration per iteration: {duration_per_iteration}s")
-    logger.info(f"   Buyers: {num_buyers}, Providers: {num_providers}")
+    logger.info("🎯 Starting Monte Carlo simulation:")
+    logger.info("   Iterations: %s", iterations)
+    logger.info("   Duration per iteration: %ss", duration_per_iteration)
+    logger.info("   Buyers: %s, Providers: %s", num_buyers, num_providers)
+    
+    start_time = time.monotonic()
     
-    all_results = []
-    start_time = time.time()
+    # Only the headline numbers are kept in memory; every full iteration
+    # result is appended to a JSON Lines file as soon as it finishes
+    success_rates, response_times, utilizations, corruptions, economic_efficiencies = [], [], [], [], []
+    total_requests = total_successful = 0
+    total_earnings = 0.0
     
-    for i in range(iterations):
-        logger.info(f"\n{'='*20} ITERATION {i+1}/{iterations} {'='*20}")
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    raw_results_file = f"monte_carlo_results_{timestamp}.jsonl"
+    
+    # Iterations are independent, so each runs in its own process with its own seed
+    loop = asyncio.get_running_loop()
+    seeds = np.random.SeedSequence().generate_state(iterations).tolist()
+    
+    with ProcessPoolExecutor(max_workers=min(iterations, os.cpu_count() or 1)) as pool, \
+         open(raw_results_file, 'wb') as raw_f:
         
-        try:
-            # Run single simulation
-            result = await run_single_simulation(
-                duration=duration_per_iteration,
-                num_buyers=num_buyers,
-                num_providers=num_providers
-            )
+        async def run_iteration(i: int):
+            try:
+                return i, await loop.run_in_executor(pool, _run_iteration_sync, seeds[i], duration_per_iteration,
+                                                     num_buyers, num_providers)
+            except Exception as e:
+                return i, e
+        
+        # Report iterations in completion order
+        for next_done in asyncio.as_completed([run_iteration(i) for i in range(iterations)]):
+            i, result = await next_done
+            logger.info("\n==================== ITERATION %s/%s ====================", i+1, iterations)
             
-            all_results.append(result)
+            if isinstance(result, Exception):
+                logger.error("❌ Error in iteration %s: %s", i+1, result)
+                continue
             
-            # Log iteration summary
-            logger.info(f"📊 Iteration {i+1} Summary:")
-            logger.info(f"   Success Rate: {result['requests']['success_rate']:.1f}%")
-            logger.info(f"   Avg Response Time: {result['requests']['avg_response_time']:.2f}s")
-            logger.info(f"   Provider Utilization: {result['providers']['avg_utilization']:.2f}")
-            logger.info(f"   Network Corruptions: {result['network']['corruptions']}")
-            logger.info(f"   Economic Efficiency: {result['economics']['economic_efficiency']:.1f}%")
+            raw_f.write(_encode_line({'iteration': i + 1, **result}))
+            raw_f.flush()
             
-        except Exception as e:
-            logger.error(f"❌ Error in iteration {i+1}: {e}")
-            continue
-        
-        # Short break between iterations
-        if i < iterations - 1:
-            await asyncio.sleep(2)
+            success_rates.append(result['requests']['success_rate'])
+            response_times.append(result['requests']['avg_response_time'])
+            utilizations.append(result['providers']['avg_utilization'])
+            corruptions.append(result['network']['corruptions'])
+            economic_efficiencies.append(result['economics']['economic_efficiency'])
+            total_requests += result['requests']['total']
+            total_successful += result['requests']['successful']
+            total_earnings += result['economics']['total_provider_earnings']
+            
+            # Log iteration summary
+            logger.info("📊 Iteration %s Summary:", i+1)
+            logger.info("   Success Rate: %.1f%%", result['requests']['success_rate'])
+            logger.info("   Avg Response Time: %.2fs", result['requests']['avg_response_time'])
+            logger.info("   Provider Utilization: %.2f", result['providers']['avg_utilization'])
+            logger.info("   Network Corruptions: %s", result['network']['corruptions'])
+            logger.info("   Economic Efficiency: %.1f%%", result['economics']['economic_efficiency'])
     
-    total_simulation_time = time.time() - start_time
+    total_simulation_time = time.monotonic() - start_time
     
     # Calculate comprehensive statistics
-    if all_results:
-        logger.info(f"\n{'='*20} MONTE CARLO RESULTS {'='*20}")
-        
-        # Extract key metrics
-        success_rates = [r['requests']['success_rate'] for r in all_results]
-        response_times = [r['requests']['avg_response_time'] for r in all_results]
-        utilizations = [r['providers']['avg_utilization'] for r in all_results]
-        corruptions = [r['network']['corruptions'] for r in all_results]
-        economic_efficiencies = [r['economics']['economic_efficiency'] for r in all_results]
+    if success_rates:
+        logger.info("\n==================== MONTE CARLO RESULTS ====================")
         
         # Calculate statistics
         def calc_stats(values):
@@ -1218,40 +1729,35 @@ async def run_monte_carlo_simulation(iterations: int = 5,
         economic_stats = calc_stats(economic_efficiencies)
         
         # Display comprehensive results
-        logger.info(f"🎯 SUCCESS RATE:")
-        logger.info(f"   Mean: {success_stats['mean']:.1f}% ± {success_stats['std']:.1f}%")
-        logger.info(f"   Range: {success_stats['min']:.1f}% - {success_stats['max']:.1f}%")
+        logger.info("🎯 SUCCESS RATE:")
+        logger.info("   Mean: %.1f%% ± %.1f%%", success_stats['mean'], success_stats['std'])
+        logger.info("   Range: %.1f%% - %.1f%%", success_stats['min'], success_stats['max'])
         
-        logger.info(f"⏱️ RESPONSE TIME:")
-        logger.info(f"   Mean: {response_stats['mean']:.2f}s ± {response_stats['std']:.2f}s")
-        logger.info(f"   Range: {response_stats['min']:.2f}s - {response_stats['max']:.2f}s")
+        logger.info("⏱️ RESPONSE TIME:")
+        logger.info("   Mean: %.2fs ± %.2fs", response_stats['mean'], response_stats['std'])
+        logger.info("   Range: %.2fs - %.2fs", response_stats['min'], response_stats['max'])
         
-        logger.info(f"💾 PROVIDER UTILIZATION:")
-        logger.info(f"   Mean: {utilization_stats['mean']:.2f} ± {utilization_stats['std']:.2f}")
-        logger.info(f"   Range: {utilization_stats['min']:.2f} - {utilization_stats['max']:.2f}")
+        logger.info("💾 PROVIDER UTILIZATION:")
+        logger.info("   Mean: %.2f ± %.2f", utilization_stats['mean'], utilization_stats['std'])
+        logger.info("   Range: %.2f - %.2f", utilization_stats['min'], utilization_stats['max'])
         
-        logger.info(f"💰 ECONOMIC EFFICIENCY:")
-        logger.info(f"   Mean: {economic_stats['mean']:.1f}% ± {economic_stats['std']:.1f}%")
-        logger.info(f"   Range: {economic_stats['min']:.1f}% - {economic_stats['max']:.1f}%")
+        logger.info("💰 ECONOMIC EFFICIENCY:")
+        logger.info("   Mean: %.1f%% ± %.1f%%", economic_stats['mean'], economic_stats['std'])
+        logger.info("   Range: %.1f%% - %.1f%%", economic_stats['min'], economic_stats['max'])
         
-        logger.info(f"🔒 NETWORK CORRUPTIONS:")
-        logger.info(f"   Total: {sum(corruptions)} across all iterations")
-        logger.info(f"   Average per iteration: {statistics.mean(corruptions):.1f}")
+        logger.info("🔒 NETWORK CORRUPTIONS:")
+        logger.info("   Total: %s across all iterations", sum(corruptions))
+        logger.info("   Average per iteration: %.1f", statistics.mean(corruptions))
         
         # Aggregate totals
-        total_requests = sum(r['requests']['total'] for r in all_results)
-        total_successful = sum(r['requests']['successful'] for r in all_results)
-        total_earnings = sum(r['economics']['total_provider_earnings'] for r in all_results)
-        
-        logger.info(f"\n📈 AGGREGATE TOTALS:")
-        logger.info(f"   Total Requests: {total_requests}")
-        logger.info(f"   Total Successful: {total_successful}")
-        logger.info(f"   Overall Success Rate: {(total_successful/max(total_requests,1))*100:.1f}%")
-        logger.info(f"   Total Economic Value: ${total_earnings:.2f}")
-        logger.info(f"   Simulation Time: {total_simulation_time:.1f}s")
-        
-        # Save detailed results
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        logger.info("\n📈 AGGREGATE TOTALS:")
+        logger.info("   Total Requests: %s", total_requests)
+        logger.info("   Total Successful: %s", total_successful)
+        logger.info("   Overall Success Rate: %.1f%%", (total_successful/max(total_requests,1))*100)
+        logger.info("   Total Economic Value: $%.2f", total_earnings)
+        logger.info("   Simulation Time: %.1fs", total_simulation_time)
+        
+        # Save summary statistics (the raw results are already on disk)
         results_file = f"monte_carlo_results_{timestamp}.json"
         
         summary_data = {
@@ -1269,13 +1775,13 @@ async def run_monte_carlo_simulation(iterations: int = 5,
                 'economic_efficiency': economic_stats,
                 'total_corruptions': sum(corruptions)
             },
-            'raw_results': all_results
+            'raw_results_file': raw_results_file
         }
         
-        with open(results_file, 'w') as f:
-            json.dump(summary_data, f, indent=2)
+        with open(results_file, 'wb') as f:
+            f.write(_encode_pretty(summary_data))
         
-        logger.info(f"📄 Detailed results saved to {results_file}")
+        logger.info("📄 Summary saved to %s, raw results in %s", results_file, raw_results_file)
         
         # Generate summary report
         report_file = f"simulation_report_{timestamp}.txt"
@@ -1299,16 +1805,17 @@ async def run_monte_carlo_simulation(iterations: int = 5,
             f.write(f"  - Overall Success Rate: {(total_successful/max(total_requests,1))*100:.1f}%\n")
             f.write(f"  - Total Economic Value Generated: ${total_earnings:.2f}\n")
         
-        logger.info(f"📊 Summary report saved to {report_file}")
+        logger.info("📊 Summary report saved to %s", report_file)
         
     else:
         logger.error("❌ No successful simulation iterations completed!")
 
 if __name__ == "__main__":
     # Run the enhanced simulation
-    asyncio.run(run_monte_carlo_simulation(
-        iterations=3,           # Number of Monte Carlo iterations
-        duration_per_iteration=30,  # Duration of each simulation run
-        num_buyers=2,          # Number of buyer agents
-        num_providers=3        # Number of storage provider agents
-    ))
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(run_monte_carlo_simulation(
+            iterations=3,           # Number of Monte Carlo iterations
+            duration_per_iteration=30,  # Duration of each simulation run
+            num_buyers=2,          # Number of buyer agents
+            num_providers=3        # Number of storage provider agents
+        ))
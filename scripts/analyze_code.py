@@ -4,9 +4,93 @@ Análise detalhada do código da simulação multi-agente
 """
 
 import ast
+import hashlib
 import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+# Resultados por arquivo ficam em disco, indexados por caminho, mtime e tamanho
+# do arquivo analisado e pela mtime deste script (mudou o analisador, muda a chave)
+CACHE_DIR = '.analysis_cache'
+
+class DefinitionCollector(ast.NodeVisitor):
+    """Coleta nomes de funções e classes percorrendo apenas blocos de comandos
+    
+    Definições só aparecem como comandos, então as subárvores de expressões
+    (a maior parte dos nós) nunca são visitadas.
+    """
+    
+    # Campos que contêm listas de comandos (ou de handlers/cases com corpo)
+    BLOCK_FIELDS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+    
+    def __init__(self):
+        self.function_names = []
+        self.class_names = []
+    
+    def generic_visit(self, node):
+        for field in self.BLOCK_FIELDS:
+            block = getattr(node, field, None)
+            if isinstance(block, list):
+                for child in block:
+                    # Classes da AST não têm subclasses: comparar o tipo exato evita
+                    # o despacho por nome de NodeVisitor.visit a cada comando
+                    tp = type(child)
+                    if tp is ast.FunctionDef:
+                        self.function_names.append(child.name)
+                    elif tp is ast.ClassDef:
+                        self.class_names.append(child.name)
+                    self.generic_visit(child)
+
+def _cache_path(filename):
+    """Caminho do cache para a versão atual do arquivo"""
+    st = os.stat(filename)
+    analyzer_mtime = os.stat(__file__).st_mtime_ns
+    key = f"{os.path.abspath(filename)}:{st.st_mtime_ns}:{st.st_size}:{analyzer_mtime}"
+    return os.path.join(CACHE_DIR, hashlib.md5(key.encode()).hexdigest() + '.pkl')
+
+def analyze_file(filename):
+    """Analisa um arquivo, reaproveitando o resultado em cache se ele não mudou"""
+    cache_path = _cache_path(filename)
+    try:
+        with open(cache_path, 'rb') as f:
+            return filename, pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        pass
+    
+    file_info = _analyze_source(filename)
+    
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(cache_path, 'wb') as f:
+        pickle.dump(file_info, f, protocol=5)
+    
+    return filename, file_info
+
+def _analyze_source(filename):
+    """Lê e analisa um único arquivo (executado nos processos do pool)"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    lines = len(content.splitlines())
+    
+    try:
+        # Uma única passada pelos comandos, guardando apenas os nomes
+        collector = DefinitionCollector()
+        collector.visit(ast.parse(content))  # A AST é liberada logo em seguida
+    except SyntaxError:
+        return {
+            'lines': lines,
+            'error': 'Syntax error in parsing'
+        }
+    
+    return {
+        'lines': lines,
+        'functions': len(collector.function_names),
+        'classes': len(collector.class_names),
+        'function_names': collector.function_names,
+        'class_names': collector.class_names
+    }
+
 def analyze_code_structure():
     """Analisa a estrutura do código fonte"""
     
@@ -24,45 +108,24 @@ def analyze_code_structure():
         'files': {}
     }
     
-    for filename in files_to_analyze:
-        if os.path.exists(filename):
-            with open(filename, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            lines = len(content.splitlines())
-            analysis['total_lines'] += lines
-            
-            try:
-                tree = ast.parse(content)
-                
-                functions = [node for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
-                classes = [node for node in ast.walk(tree) if isinstance(node, ast.ClassDef)]
-                
-                analysis['total_functions'] += len(functions)
-                analysis['total_classes'] += len(classes)
-                
-                analysis['files'][filename] = {
-                    'lines': lines,
-                    'functions': len(functions),
-                    'classes': len(classes),
-                    'function_names': [f.name for f in functions],
-                    'class_names': [c.name for c in classes]
-                }
-                
-            except SyntaxError:
-                analysis['files'][filename] = {
-                    'lines': lines,
-                    'error': 'Syntax error in parsing'
-                }
+    # Os arquivos são independentes: cada um é lido e analisado num processo
+    existing_files = [filename for filename in files_to_analyze if os.path.exists(filename)]
+    if not existing_files:
+        return analysis
+    
+    with ProcessPoolExecutor(max_workers=min(len(existing_files), os.cpu_count() or 1)) as pool:
+        for filename, file_info in pool.map(analyze_file, existing_files):
+            analysis['files'][filename] = file_info
+            analysis['total_lines'] += file_info['lines']
+            analysis['total_functions'] += file_info.get('functions', 0)
+            analysis['total_classes'] += file_info.get('classes', 0)
     
     return analysis
 
-def generate_code_documentation():
-    """Gera documentação detalhada do código"""
+def iter_code_documentation(analysis):
+    """Gera a documentação em pedaços, na ordem em que devem ser escritos"""
     
-    analysis = analyze_code_structure()
-    
-    doc = f"""
+    yield f"""
 # ANÁLISE DETALHADA DO CÓDIGO - SISTEMA MULTI-AGENTE
 
 ## Resumo Estatístico
@@ -243,7 +306,7 @@ Implementação alternativa usando o framework SPADE:
     # Adicionar detalhes específicos por arquivo
     for filename, file_info in analysis['files'].items():
         if 'error' not in file_info:
-            doc += f"""
+            yield f"""
 
 ### Detalhes do arquivo {filename}:
 - **Linhas de código**: {file_info['lines']:,}
@@ -251,22 +314,32 @@ Implementação alternativa usando o framework SPADE:
 - **Classes**: {file_info['classes']}
 """
             if file_info['class_names']:
-                doc += f"- **Classes**: {', '.join(file_info['class_names'])}\n"
+                yield f"- **Classes**: {', '.join(file_info['class_names'])}\n"
             
             if file_info['function_names']:
                 # Mostrar apenas algumas funções principais para não ser muito verbose
                 main_functions = file_info['function_names'][:10]
-                doc += f"- **Principais funções**: {', '.join(main_functions)}\n"
+                yield f"- **Principais funções**: {', '.join(main_functions)}\n"
                 if len(file_info['function_names']) > 10:
-                    doc += f"  (e mais {len(file_info['function_names']) - 10} funções)\n"
+                    yield f"  (e mais {len(file_info['function_names']) - 10} funções)\n"
+
+def generate_code_documentation(analysis=None):
+    """Gera documentação detalhada do código
+    
+    Recebe o resultado de analyze_code_structure() para não repetir a análise.
+    """
     
-    return doc
+    if analysis is None:
+        analysis = analyze_code_structure()
+    
+    return "".join(iter_code_documentation(analysis))
 
 if __name__ == "__main__":
-    documentation = generate_code_documentation()
+    analysis = analyze_code_structure()
     
-    with open('CODE_ANALYSIS.md', 'w', encoding='utf-8') as f:
-        f.write(documentation)
+    # Os pedaços vão direto para o buffer do arquivo, sem montar o documento inteiro
+    with open('CODE_ANALYSIS.md', 'w', encoding='utf-8', buffering=1 << 16) as f:
+        f.writelines(iter_code_documentation(analysis))
     
     print("📚 Análise do código salva em: CODE_ANALYSIS.md")
-    print(f"📊 {analyze_code_structure()['total_lines']:,} linhas de código analisadas")
+    print(f"📊 {analysis['total_lines']:,} linhas de código analisadas")
@@ -4,41 +4,79 @@ Script para coletar e processar resultados de todas as simulações
 """
 
 import json
+import math
+import mmap
 import os
 import re
-import statistics
 from datetime import datetime
 from pathlib import Path
 
+# orjson serializa em C; sem ele, usa o módulo json da biblioteca padrão
+try:
+    import orjson
+    
+    def encode_pretty(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    def encode_pretty(obj):
+        return json.dumps(obj, indent=2).encode()
+
+# Padrões para extrair métricas, cada um capturando o valor num grupo nomeado
+METRIC_PATTERNS = {
+    'requests_total': r'Requests:\s*(?P<requests_total>\d+)',
+    'success_rate': r'Success Rate:\s*(?P<success_rate>[\d.]+)%',
+    'avg_response_time': r'Avg Response Time:\s*(?P<avg_response_time>[\d.]+)s',
+    'contracts_created': r'Contracts Created:\s*(?P<contracts_created>\d+)',
+    'provider_utilization': r'Provider Utilization:\s*(?P<provider_utilization>[\d.]+)',
+    'total_earnings': r'Total Earnings:\s*\$?(?P<total_earnings>[\d.]+)',
+    'network_corruptions': r'Network Corruptions:\s*(?P<network_corruptions>\d+)',
+    'simulation_duration': r'Simulation completed in\s*(?P<simulation_duration>[\d.]+)\s*seconds'
+}
+
+# Todos os padrões numa única alternação, compilada uma vez: o log é varrido uma só vez.
+# O padrão é de bytes para buscar direto no arquivo mapeado em memória
+METRICS_RE = re.compile('|'.join(METRIC_PATTERNS.values()).encode(), re.IGNORECASE)
+
+# Simulação -> arquivo de log dentro do diretório de resultados
+LOG_FILES = {
+    'enhanced': 'enhanced_output.log',
+    'demo': 'demo_output.log',
+    'balanced': 'balanced_output.log',
+    'spade': 'spade_output.log'
+}
+
+def list_files(directory):
+    """Nomes dos arquivos de um diretório, numa única leitura do diretório"""
+    with os.scandir(directory) as entries:
+        return {entry.name for entry in entries if entry.is_file()}
+
 def parse_log_file(log_file):
     """Extrai métricas dos arquivos de log"""
-    if not os.path.exists(log_file):
-        return {}
-    
-    with open(log_file, 'r') as f:
-        content = f.read()
-    
     results = {}
     
-    # Padrões para extrair métricas
-    patterns = {
-        'requests_total': r'Requests:\s*(\d+)',
-        'success_rate': r'Success Rate:\s*([\d.]+)%',
-        'avg_response_time': r'Avg Response Time:\s*([\d.]+)s',
-        'contracts_created': r'Contracts Created:\s*(\d+)',
-        'provider_utilization': r'Provider Utilization:\s*([\d.]+)',
-        'total_earnings': r'Total Earnings:\s*\$?([\d.]+)',
-        'network_corruptions': r'Network Corruptions:\s*(\d+)',
-        'simulation_duration': r'Simulation completed in\s*([\d.]+)\s*seconds'
-    }
-    
-    for metric, pattern in patterns.items():
-        match = re.search(pattern, content, re.IGNORECASE)
-        if match:
-            try:
-                results[metric] = float(match.group(1))
-            except ValueError:
-                results[metric] = match.group(1)
+    try:
+        f = open(log_file, 'rb')
+    except FileNotFoundError:
+        return results
+    
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return results  # mmap não aceita arquivos vazios
+        
+        # O regex percorre as páginas mapeadas, sem copiar o log para uma str
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            # Vale a primeira ocorrência de cada métrica
+            for match in METRICS_RE.finditer(content):
+                metric = match.lastgroup
+                if metric in results:
+                    continue
+                value = match.group(metric).decode('ascii')  # Só o valor capturado é decodificado
+                try:
+                    results[metric] = float(value)
+                except ValueError:
+                    results[metric] = value
+                if len(results) == len(METRIC_PATTERNS):
+                    break
     
     return results
 
@@ -51,9 +89,10 @@ def collect_json_results():
     ]
     
     json_results = {}
+    present = list_files('.')
     
     for json_file in json_files:
-        if os.path.exists(json_file):
+        if json_file in present:
             try:
                 with open(json_file, 'r') as f:
                     data = json.load(f)
@@ -63,62 +102,81 @@ def collect_json_results():
     
     return json_results
 
+class MetricAccumulator:
+    """Estatísticas de uma métrica acumuladas numa só passada (Welford)"""
+    
+    __slots__ = ('n', 'mean', 'm2', 'min', 'max', 'total')
+    
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.total = 0.0
+    
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        self.total += x
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+    
+    def std(self):
+        """Desvio padrão amostral (0 com menos de duas amostras)"""
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0
+    
+    def summary(self):
+        """Média, desvio, mínimo e máximo (zeros quando não há amostras)"""
+        if not self.n:
+            return {'mean': 0, 'std': 0, 'min': 0, 'max': 0}
+        return {'mean': self.mean, 'std': self.std(), 'min': self.min, 'max': self.max}
+
+# Métrica agregada -> chave extraída dos logs
+AGGREGATED_METRICS = {
+    'success_rate': 'success_rate',
+    'response_time': 'avg_response_time',
+    'utilization': 'provider_utilization',
+    'earnings': 'total_earnings'
+}
+
 def aggregate_results():
     """Agrega todos os resultados das simulações"""
     results_dir = "results"
     os.makedirs(results_dir, exist_ok=True)
     
-    # Coleta resultados dos logs
+    # Coleta resultados dos logs (apenas dos arquivos presentes)
+    present = list_files(results_dir)
     log_results = {
-        'enhanced': parse_log_file(f"{results_dir}/enhanced_output.log"),
-        'demo': parse_log_file(f"{results_dir}/demo_output.log"),
-        'balanced': parse_log_file(f"{results_dir}/balanced_output.log"),
-        'spade': parse_log_file(f"{results_dir}/spade_output.log")
+        sim_name: parse_log_file(os.path.join(results_dir, log_name)) if log_name in present else {}
+        for sim_name, log_name in LOG_FILES.items()
     }
     
     # Coleta resultados JSON
     json_results = collect_json_results()
     
-    # Calcula estatísticas agregadas
-    all_success_rates = []
-    all_response_times = []
-    all_utilizations = []
-    all_earnings = []
-    
-    for sim_name, sim_results in log_results.items():
-        if 'success_rate' in sim_results:
-            all_success_rates.append(sim_results['success_rate'])
-        if 'avg_response_time' in sim_results:
-            all_response_times.append(sim_results['avg_response_time'])
-        if 'provider_utilization' in sim_results:
-            all_utilizations.append(sim_results['provider_utilization'])
-        if 'total_earnings' in sim_results:
-            all_earnings.append(sim_results['total_earnings'])
+    # Calcula estatísticas agregadas numa única passada pelas simulações
+    accumulators = {name: MetricAccumulator() for name in AGGREGATED_METRICS}
+    for sim_results in log_results.values():
+        for name, key in AGGREGATED_METRICS.items():
+            value = sim_results.get(key)
+            if value is not None:
+                accumulators[name].add(value)
     
     # Estatísticas agregadas
+    earnings = accumulators['earnings']
     aggregated_stats = {
-        'success_rate': {
-            'mean': statistics.mean(all_success_rates) if all_success_rates else 0,
-            'std': statistics.stdev(all_success_rates) if len(all_success_rates) > 1 else 0,
-            'min': min(all_success_rates) if all_success_rates else 0,
-            'max': max(all_success_rates) if all_success_rates else 0
-        },
-        'response_time': {
-            'mean': statistics.mean(all_response_times) if all_response_times else 0,
-            'std': statistics.stdev(all_response_times) if len(all_response_times) > 1 else 0,
-            'min': min(all_response_times) if all_response_times else 0,
-            'max': max(all_response_times) if all_response_times else 0
-        },
-        'utilization': {
-            'mean': statistics.mean(all_utilizations) if all_utilizations else 0,
-            'std': statistics.stdev(all_utilizations) if len(all_utilizations) > 1 else 0,
-            'min': min(all_utilizations) if all_utilizations else 0,
-            'max': max(all_utilizations) if all_utilizations else 0
-        },
+        'success_rate': accumulators['success_rate'].summary(),
+        'response_time': accumulators['response_time'].summary(),
+        'utilization': accumulators['utilization'].summary(),
         'earnings': {
-            'total': sum(all_earnings) if all_earnings else 0,
-            'mean': statistics.mean(all_earnings) if all_earnings else 0,
-            'std': statistics.stdev(all_earnings) if len(all_earnings) > 1 else 0
+            'total': earnings.total,
+            'mean': earnings.mean,
+            'std': earnings.std()
         }
     }
     
@@ -139,8 +197,8 @@ def aggregate_results():
     
     # Salva resultados agregados
     output_file = f"{results_dir}/aggregated_results.json"
-    with open(output_file, 'w') as f:
-        json.dump(final_results, f, indent=2)
+    with open(output_file, 'wb') as f:
+        f.write(encode_pretty(final_results))
     
     print(f"📊 Resultados coletados e salvos em: {output_file}")
     print(f"✅ {final_results['summary']['successful_simulations']} simulações processadas com sucesso")
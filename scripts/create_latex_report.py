@@ -6,15 +6,23 @@ Script para criar relatório LaTeX com resultados das simulações
 import json
 import os
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from types import SimpleNamespace
 
-def load_results():
-    """Carrega os resultados agregados"""
-    results_file = "results/aggregated_results.json"
-    if not os.path.exists(results_file):
+def load_results(results_file="results/aggregated_results.json"):
+    """Carrega os resultados agregados (decodificados de novo só se o arquivo mudou)"""
+    try:
+        mtime_ns = os.stat(results_file).st_mtime_ns
+    except FileNotFoundError:
         print("⚠️ Arquivo de resultados não encontrado.")
         return None
     
+    return _decode_results(results_file, mtime_ns)
+
+@lru_cache(maxsize=1)
+def _decode_results(results_file, mtime_ns):
+    """Decodifica o JSON uma vez por versão do arquivo (a mtime faz parte da chave)"""
     with open(results_file, 'r') as f:
         return json.load(f)
 
@@ -24,8 +32,11 @@ def create_latex_report():
     if not results:
         return
     
-    # Template LaTeX
-    latex_template = r"""
+    # Cada seção recebe só a parte dos resultados que usa
+    summary = SimpleNamespace(**results['summary'])
+    
+    # Template LaTeX, em fragmentos escritos em sequência no arquivo (sem concatenar)
+    latex_parts = [r"""
 \documentclass[12pt,a4paper]{article}
 \usepackage[utf8]{inputenc}
 \usepackage[brazilian]{babel}
@@ -43,7 +54,7 @@ def create_latex_report():
 
 \title{Relatório de Simulação: \\ Sistema Multi-Agente para Armazenamento em Nuvem Descentralizado}
 \author{Análise Computacional Automática}
-\date{""" + datetime.now().strftime("%d de %B de %Y") + r"""}
+\date{""", datetime.now().strftime("%d de %B de %Y"), r"""}
 
 \begin{document}
 
@@ -86,23 +97,23 @@ As simulações foram executadas utilizando diferentes configurações:
 
 \subsection{Resumo Executivo}
 
-""" + f"""
+""", f"""
 \\begin{{itemize}}
-    \\item Total de simulações executadas: {results['summary']['total_simulations']}
-    \\item Simulações bem-sucedidas: {results['summary']['successful_simulations']}
-    \\item Taxa de sucesso média: {results['summary']['avg_success_rate']:.2f}\\%
-    \\item Tempo de resposta médio: {results['summary']['avg_response_time']:.3f}s
-    \\item Valor econômico total gerado: \\${results['summary']['total_economic_value']:.2f}
+    \\item Total de simulações executadas: {summary.total_simulations}
+    \\item Simulações bem-sucedidas: {summary.successful_simulations}
+    \\item Taxa de sucesso média: {summary.avg_success_rate:.2f}\\%
+    \\item Tempo de resposta médio: {summary.avg_response_time:.3f}s
+    \\item Valor econômico total gerado: \\${summary.total_economic_value:.2f}
 \\end{{itemize}}
-""" + r"""
+""", r"""
 
 \subsection{Análise Detalhada por Simulação}
 
-""" + generate_simulation_details(results) + r"""
+""", generate_simulation_details(results['individual_simulations']), r"""
 
 \subsection{Análise Estatística Agregada}
 
-""" + generate_statistical_analysis(results) + r"""
+""", generate_statistical_analysis(results['aggregated_statistics']), r"""
 
 \section{Visualizações}
 
@@ -131,11 +142,11 @@ As figuras a seguir apresentam análises visuais dos resultados obtidos:
 
 \section{Discussão dos Resultados}
 
-""" + generate_discussion(results) + r"""
+""", generate_discussion(summary), r"""
 
 \section{Conclusões e Recomendações}
 
-""" + generate_conclusions(results) + r"""
+""", generate_conclusions(), r"""
 
 \section{Trabalhos Futuros}
 
@@ -185,24 +196,23 @@ O código-fonte completo está disponível no repositório do projeto, incluindo
 Os dados completos das simulações estão disponíveis em formato JSON no arquivo aggregated\_results.json.
 
 \end{document}
-"""
+"""]
     
     # Salvar o relatório
     output_file = "results/simulation_report.tex"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(latex_template)
+    with open(output_file, 'w', encoding='utf-8', buffering=1 << 16) as f:
+        f.writelines(latex_parts)
     
     print(f"📄 Relatório LaTeX criado: {output_file}")
     return output_file
 
-def generate_simulation_details(results):
+def generate_simulation_details(simulations):
     """Gera detalhes de cada simulação"""
-    details = ""
-    simulations = results['individual_simulations']
+    details = []
     
     for sim_name, sim_data in simulations.items():
         if sim_data:
-            details += f"""
+            details.append(f"""
 \\subsubsection{{{sim_name.capitalize()} Simulation}}
 
 \\begin{{itemize}}
@@ -214,52 +224,48 @@ def generate_simulation_details(results):
     \\item Total Earnings: \\${sim_data.get('total_earnings', 'N/A')}
     \\item Network Corruptions: {sim_data.get('network_corruptions', 'N/A')}
 \\end{{itemize}}
-"""
+""")
     
-    return details
+    return "".join(details)
 
-def generate_statistical_analysis(results):
+def generate_statistical_analysis(stats):
     """Gera análise estatística"""
-    stats = results['aggregated_statistics']
-    
-    analysis = r"""
+    analysis = [r"""
 \begin{table}[H]
 \centering
 \begin{tabular}{@{}lcccc@{}}
 \toprule
 Métrica & Média & Desvio Padrão & Mínimo & Máximo \\
 \midrule
-"""
+"""]
     
     for metric, data in stats.items():
         if isinstance(data, dict) and 'mean' in data:
             metric_name = metric.replace('_', ' ').title()
-            analysis += f"{metric_name} & {data['mean']:.3f} & {data['std']:.3f} & {data.get('min', 'N/A')} & {data.get('max', 'N/A')} \\\\\n"
+            analysis.append(f"{metric_name} & {data['mean']:.3f} & {data['std']:.3f} & {data.get('min', 'N/A')} & {data.get('max', 'N/A')} \\\\\n")
     
-    analysis += r"""
+    analysis.append(r"""
 \bottomrule
 \end{tabular}
 \caption{Estatísticas agregadas das simulações}
 \label{tab:stats}
 \end{table}
-"""
+""")
     
-    return analysis
+    return "".join(analysis)
 
-def generate_discussion(results):
+def generate_discussion(summary):
     """Gera discussão dos resultados"""
-    summary = results['summary']
-    
     discussion = f"""
 Os resultados demonstram que o sistema multi-agente proposto apresenta performance consistente across different scenarios. 
 
 \\subsection{{Performance Geral}}
 
-Com uma taxa de sucesso média de {summary['avg_success_rate']:.2f}\\%, o sistema mostra-se robusto mesmo na presença de falhas simuladas. O tempo de resposta médio de {summary['avg_response_time']:.3f} segundos está dentro de parâmetros aceitáveis para aplicações de armazenamento distribuído.
+Com uma taxa de sucesso média de {summary.avg_success_rate:.2f}\\%, o sistema mostra-se robusto mesmo na presença de falhas simuladas. O tempo de resposta médio de {summary.avg_response_time:.3f} segundos está dentro de parâmetros aceitáveis para aplicações de armazenamento distribuído.
 
 \\subsection{{Eficiência Econômica}}
 
-O valor econômico total gerado de \\${summary['total_economic_value']:.2f} indica que o sistema é economicamente viável, criando valor através da eficiente alocação de recursos de armazenamento.
+O valor econômico total gerado de \\${summary.total_economic_value:.2f} indica que o sistema é economicamente viável, criando valor através da eficiente alocação de recursos de armazenamento.
 
 \\subsection{{Robustez do Sistema}}
 
@@ -274,7 +280,7 @@ O sistema demonstrou capacidade de operação estável mesmo com:
     
     return discussion
 
-def generate_conclusions(results):
+def generate_conclusions():
     """Gera conclusões"""
     return r"""
 Com base na análise abrangente realizada, podemos concluir:
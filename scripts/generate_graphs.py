@@ -4,74 +4,132 @@ Script para gerar gráficos e visualizações dos resultados das simulações
 """
 
 import json
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 import os
+import sys
 
-# Configuração do estilo
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
+# Bibliotecas de gráficos: importadas só quando há gráficos a gerar (ver _import_plotting)
+plt = Normalize = to_rgba = offset_copy = np = None
 
-def load_results():
-    """Carrega os resultados agregados"""
-    results_file = "results/aggregated_results.json"
-    if not os.path.exists(results_file):
+# As figuras de 15in entram no relatório LaTeX com 0.9\textwidth (~5.8in):
+# 150 dpi já dá ~390 dpi efetivos no PDF, com 1/4 dos pixels de 300 dpi
+SAVE_KW = {'dpi': 150}
+
+# Paleta "husl" de 6 cores do seaborn (sns.color_palette('husl')), fixada aqui
+# para não importar seaborn (e pandas) só para definir o ciclo de cores
+HUSL_PALETTE = ('#f77189', '#bb9832', '#50b131', '#36ada4', '#3ba3ec', '#e866f4')
+
+# Gráficos gerados a partir de results/aggregated_results.json
+GRAPH_FILES = (
+    'results/performance_comparison.png',
+    'results/statistical_analysis.png',
+    'results/economic_analysis.png'
+)
+
+def load_results(results_file="results/aggregated_results.json"):
+    """Carrega os resultados agregados (decodificados de novo só se o arquivo mudou)"""
+    try:
+        mtime_ns = os.stat(results_file).st_mtime_ns
+    except FileNotFoundError:
         print("⚠️ Arquivo de resultados não encontrado. Execute collect_results.py primeiro.")
         return None
     
+    return _decode_results(results_file, mtime_ns)
+
+def graphs_up_to_date(results_file="results/aggregated_results.json"):
+    """Todos os gráficos existem e são mais novos que os resultados e que este script"""
+    try:
+        newest_input = max(os.stat(results_file).st_mtime_ns, os.stat(__file__).st_mtime_ns)
+        return all(os.stat(graph).st_mtime_ns >= newest_input for graph in GRAPH_FILES)
+    except FileNotFoundError:
+        return False
+
+def _import_plotting():
+    """Importa matplotlib e numpy e configura o estilo (uma vez)"""
+    global plt, Normalize, to_rgba, offset_copy, np
+    if plt is not None:
+        return
+    
+    import matplotlib
+    matplotlib.use('Agg', force=True)  # Só gera PNGs: backend de arquivo, sem inicializar GUI
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import Normalize, to_rgba
+    from matplotlib.transforms import offset_copy
+    import numpy as np
+    
+    # Configuração do estilo (o estilo seaborn-v0_8 vem com o próprio matplotlib)
+    plt.style.use('seaborn-v0_8')
+    plt.rcParams['axes.prop_cycle'] = plt.cycler(color=HUSL_PALETTE)
+
+@lru_cache(maxsize=1)
+def _decode_results(results_file, mtime_ns):
+    """Decodifica o JSON uma vez por versão do arquivo (a mtime faz parte da chave)"""
     with open(results_file, 'r') as f:
         return json.load(f)
 
+def metric_table(simulations, keys, fill=0.0):
+    """Nomes das simulações com dados e a matriz simulação x métrica correspondente
+    
+    As colunas seguem a ordem de keys; métricas ausentes recebem fill.
+    """
+    rows = [(name, data) for name, data in simulations.items() if data]
+    # fromiter com count preenche o array pré-alocado direto, sem listas intermediárias
+    matrix = np.fromiter(
+        (data.get(key, fill) for _, data in rows for key in keys),
+        dtype=np.float64, count=len(rows) * len(keys)
+    ).reshape(len(rows), len(keys))
+    return [name.capitalize() for name, _ in rows], matrix
+
+def normalize_columns(matrix):
+    """Escala cada coluna para [0, 1]; colunas constantes ficam em 0 em vez de NaN"""
+    low = matrix.min(axis=0)
+    span = np.ptp(matrix, axis=0)
+    return (matrix - low) / np.where(span == 0, 1.0, span)
+
+def style_bar_axes(ax, title, ylabel):
+    """Título, rótulo do eixo y e nomes das simulações inclinados, depois das barras desenhadas"""
+    ax.set_title(title)
+    ax.set_ylabel(ylabel)
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right', rotation_mode='anchor')
+
 def create_performance_comparison_chart(results):
     """Cria gráfico de comparação de performance entre simulações"""
+    _import_plotting()
     simulations = results['individual_simulations']
     
-    # Preparar dados
-    sim_names = []
-    success_rates = []
-    response_times = []
-    utilizations = []
-    
-    for name, data in simulations.items():
-        if data:  # Se tem dados
-            sim_names.append(name.capitalize())
-            success_rates.append(data.get('success_rate', 0))
-            response_times.append(data.get('avg_response_time', 0))
-            utilizations.append(data.get('provider_utilization', 0))
+    # Preparar dados: uma linha por simulação com dados, uma coluna por métrica
+    sim_names, data_matrix = metric_table(
+        simulations, ('success_rate', 'avg_response_time', 'provider_utilization')
+    )
+    success_rates, response_times, utilizations = data_matrix.T
     
     # Criar figura com subplots
-    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12), layout='constrained')
     fig.suptitle('Comparação de Performance entre Simulações', fontsize=16, fontweight='bold')
     
     # Taxa de Sucesso
     axes[0, 0].bar(sim_names, success_rates, color='green', alpha=0.7)
-    axes[0, 0].set_title('Taxa de Sucesso (%)')
-    axes[0, 0].set_ylabel('Percentage')
-    axes[0, 0].tick_params(axis='x', rotation=45)
+    style_bar_axes(axes[0, 0], 'Taxa de Sucesso (%)', 'Percentage')
     
     # Tempo de Resposta
     axes[0, 1].bar(sim_names, response_times, color='blue', alpha=0.7)
-    axes[0, 1].set_title('Tempo de Resposta Médio (s)')
-    axes[0, 1].set_ylabel('Seconds')
-    axes[0, 1].tick_params(axis='x', rotation=45)
+    style_bar_axes(axes[0, 1], 'Tempo de Resposta Médio (s)', 'Seconds')
     
     # Utilização dos Provedores
     axes[1, 0].bar(sim_names, utilizations, color='orange', alpha=0.7)
-    axes[1, 0].set_title('Utilização dos Provedores')
-    axes[1, 0].set_ylabel('Utilization Ratio')
-    axes[1, 0].tick_params(axis='x', rotation=45)
+    style_bar_axes(axes[1, 0], 'Utilização dos Provedores', 'Utilization Ratio')
     
     # Resumo Comparativo
     metrics = ['Success Rate', 'Response Time', 'Utilization']
-    data_matrix = np.array([success_rates, response_times, utilizations]).T
     
     # Normalizar dados para comparação
-    data_normalized = (data_matrix - data_matrix.min(axis=0)) / (data_matrix.max(axis=0) - data_matrix.min(axis=0))
+    data_normalized = normalize_columns(data_matrix)
     
-    im = axes[1, 1].imshow(data_normalized, cmap='viridis', aspect='auto')
+    # Escala de cores fixa: os dados já estão em [0, 1]
+    im = axes[1, 1].imshow(data_normalized, cmap='viridis', aspect='auto', interpolation='nearest',
+                           norm=Normalize(vmin=0, vmax=1))
     axes[1, 1].set_xticks(range(len(metrics)))
     axes[1, 1].set_xticklabels(metrics)
     axes[1, 1].set_yticks(range(len(sim_names)))
@@ -81,53 +139,58 @@ def create_performance_comparison_chart(results):
     # Adicionar colorbar
     plt.colorbar(im, ax=axes[1, 1])
     
-    plt.tight_layout()
-    plt.savefig('results/performance_comparison.png', dpi=300, bbox_inches='tight')
+    plt.savefig('results/performance_comparison.png', **SAVE_KW)
+    plt.close(fig)  # Libera a figura (e todos os artistas) antes do próximo gráfico
     print("📊 Gráfico de comparação salvo: results/performance_comparison.png")
 
 def create_statistical_analysis_chart(results):
     """Cria gráficos de análise estatística"""
+    _import_plotting()
     stats = results['aggregated_statistics']
     
-    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12), layout='constrained')
     fig.suptitle('Análise Estatística das Simulações', fontsize=16, fontweight='bold')
     
-    # Box plot de métricas
-    metrics_data = []
+    # Estatísticas resumidas de cada métrica (só o que collect_results.py calculou)
     metrics_labels = []
+    means = []
+    stds = []
+    mins = []
+    maxs = []
     
     for metric_name in ['success_rate', 'response_time', 'utilization']:
         if metric_name in stats:
             metric_stats = stats[metric_name]
-            # Simular distribuição baseada nas estatísticas
-            mean = metric_stats['mean']
-            std = metric_stats['std']
-            simulated_data = np.random.normal(mean, std, 100) if std > 0 else [mean] * 100
-            metrics_data.append(simulated_data)
             metrics_labels.append(metric_name.replace('_', ' ').title())
+            means.append(metric_stats['mean'])
+            stds.append(metric_stats['std'])
+            mins.append(metric_stats.get('min', metric_stats['mean']))
+            maxs.append(metric_stats.get('max', metric_stats['mean']))
     
-    axes[0, 0].boxplot(metrics_data, labels=metrics_labels)
-    axes[0, 0].set_title('Distribuição das Métricas')
-    axes[0, 0].tick_params(axis='x', rotation=45)
+    means = np.array(means)
+    x_pos = np.arange(len(metrics_labels))
     
-    # Barras de erro
-    means = [stats[m]['mean'] for m in ['success_rate', 'response_time', 'utilization'] if m in stats]
-    stds = [stats[m]['std'] for m in ['success_rate', 'response_time', 'utilization'] if m in stats]
+    # Faixa observada (mínimo a máximo) em torno da média
+    axes[0, 0].errorbar(x_pos, means, yerr=[means - np.array(mins), np.array(maxs) - means],
+                        fmt='o', capsize=8, markersize=8)
+    axes[0, 0].set_xticks(x_pos)
+    axes[0, 0].set_xticklabels(metrics_labels, rotation=45)
+    axes[0, 0].set_xlim(-0.5, len(metrics_labels) - 0.5)
+    axes[0, 0].set_title('Faixa das Métricas (Mínimo, Média, Máximo)')
     
-    x_pos = np.arange(len(metrics_labels))
+    # Barras de erro
     axes[0, 1].bar(x_pos, means, yerr=stds, capsize=5, alpha=0.7)
     axes[0, 1].set_xticks(x_pos)
     axes[0, 1].set_xticklabels(metrics_labels, rotation=45)
     axes[0, 1].set_title('Médias com Desvio Padrão')
     
-    # Distribuição de ganhos
+    # Ganhos médios por simulação
     if 'earnings' in stats:
         earnings_stats = stats['earnings']
-        earnings_data = np.random.gamma(2, earnings_stats['mean']/2, 100) if earnings_stats['mean'] > 0 else [0] * 100
-        axes[1, 0].hist(earnings_data, bins=20, alpha=0.7, color='green')
-        axes[1, 0].set_title('Distribuição de Ganhos Econômicos')
-        axes[1, 0].set_xlabel('Earnings ($)')
-        axes[1, 0].set_ylabel('Frequency')
+        axes[1, 0].bar(['Média por simulação'], [earnings_stats['mean']],
+                       yerr=[earnings_stats.get('std', 0)], capsize=5, alpha=0.7, color='green')
+        axes[1, 0].set_title('Ganhos Econômicos')
+        axes[1, 0].set_ylabel('Earnings ($)')
     
     # Radar chart das métricas
     categories = []
@@ -150,67 +213,61 @@ def create_statistical_analysis_chart(results):
         
         angles = np.linspace(0, 2 * np.pi, len(categories))
         
-        axes[1, 1].plot(angles, values, 'o-', linewidth=2)
-        axes[1, 1].fill(angles, values, alpha=0.25)
+        # Contorno e preenchimento no mesmo polígono; a linha só carrega os marcadores
+        axes[1, 1].fill(angles, values, facecolor=to_rgba('C0', 0.25), edgecolor='C0', linewidth=2,
+                        closed=False)
+        axes[1, 1].plot(angles, values, 'o', color='C0')
         axes[1, 1].set_xticks(angles[:-1])
         axes[1, 1].set_xticklabels(categories[:-1])
         axes[1, 1].set_ylim(0, 1)
         axes[1, 1].set_title('Radar de Performance Normalizada')
         axes[1, 1].grid(True)
     
-    plt.tight_layout()
-    plt.savefig('results/statistical_analysis.png', dpi=300, bbox_inches='tight')
+    plt.savefig('results/statistical_analysis.png', **SAVE_KW)
+    plt.close(fig)  # Libera a figura (e todos os artistas) antes do próximo gráfico
     print("📈 Gráfico de análise estatística salvo: results/statistical_analysis.png")
 
 def create_economic_analysis_chart(results):
     """Cria gráficos de análise econômica"""
+    _import_plotting()
     simulations = results['individual_simulations']
     
-    # Extrair dados econômicos
-    sim_names = []
-    earnings = []
-    utilizations = []
-    efficiency = []
-    
-    for name, data in simulations.items():
-        if data and 'total_earnings' in data and 'provider_utilization' in data:
-            sim_names.append(name.capitalize())
-            earnings.append(data['total_earnings'])
-            utilizations.append(data['provider_utilization'])
-            # Eficiência como ganhos por unidade de utilização
-            eff = data['total_earnings'] / max(data['provider_utilization'], 0.01)
-            efficiency.append(eff)
+    # Extrair dados econômicos (só simulações com ganhos e utilização)
+    names, table = metric_table(simulations, ('total_earnings', 'provider_utilization'), fill=np.nan)
+    complete = ~np.isnan(table).any(axis=1)
+    sim_names = [name for name, keep in zip(names, complete) if keep]
+    earnings, utilizations = table[complete].T
+    # Eficiência como ganhos por unidade de utilização
+    efficiency = earnings / np.maximum(utilizations, 0.01)
     
     if not sim_names:
         print("⚠️ Dados econômicos insuficientes para gráficos")
         return
     
-    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12), layout='constrained')
     fig.suptitle('Análise Econômica das Simulações', fontsize=16, fontweight='bold')
     
     # Ganhos por simulação
     bars1 = axes[0, 0].bar(sim_names, earnings, color='darkgreen', alpha=0.7)
-    axes[0, 0].set_title('Ganhos Totais por Simulação')
-    axes[0, 0].set_ylabel('Earnings ($)')
-    axes[0, 0].tick_params(axis='x', rotation=45)
+    style_bar_axes(axes[0, 0], 'Ganhos Totais por Simulação', 'Earnings ($)')
     
     # Adicionar valores nas barras
-    for bar, value in zip(bars1, earnings):
-        axes[0, 0].text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(earnings)*0.01,
-                       f'${value:.2f}', ha='center', va='bottom')
+    axes[0, 0].bar_label(bars1, labels=[f'${value:.2f}' for value in earnings], padding=3)
     
     # Relação Utilização vs Ganhos
     if len(utilizations) > 1:
         axes[0, 1].scatter(utilizations, earnings, s=100, alpha=0.7)
-        for i, name in enumerate(sim_names):
-            axes[0, 1].annotate(name, (utilizations[i], earnings[i]), 
-                               xytext=(5, 5), textcoords='offset points')
+        # Rótulos como Text simples, todos com o mesmo deslocamento de (5, 5) pontos
+        label_transform = offset_copy(axes[0, 1].transData, fig=fig, x=5, y=5, units='points')
+        for x, y, name in zip(utilizations, earnings, sim_names):
+            axes[0, 1].text(x, y, name, transform=label_transform)
         
-        # Linha de tendência
-        if len(utilizations) > 2:
-            z = np.polyfit(utilizations, earnings, 1)
-            p = np.poly1d(z)
-            axes[0, 1].plot(utilizations, p(utilizations), "r--", alpha=0.8)
+        # Linha de tendência: uma reta só precisa dos dois extremos
+        # (sem variação na utilização o ajuste é indefinido)
+        if len(utilizations) > 2 and np.ptp(utilizations) > 0:
+            p = np.poly1d(np.polyfit(utilizations, earnings, 1))
+            xs = np.array([utilizations.min(), utilizations.max()])
+            axes[0, 1].plot(xs, p(xs), "r--", alpha=0.8)
         
         axes[0, 1].set_xlabel('Provider Utilization')
         axes[0, 1].set_ylabel('Total Earnings ($)')
@@ -218,34 +275,22 @@ def create_economic_analysis_chart(results):
     
     # Eficiência econômica
     bars2 = axes[1, 0].bar(sim_names, efficiency, color='gold', alpha=0.7)
-    axes[1, 0].set_title('Eficiência Econômica ($/Utilização)')
-    axes[1, 0].set_ylabel('Efficiency ($/unit)')
-    axes[1, 0].tick_params(axis='x', rotation=45)
+    style_bar_axes(axes[1, 0], 'Eficiência Econômica ($/Utilização)', 'Efficiency ($/unit)')
     
     # Adicionar valores nas barras
-    for bar, value in zip(bars2, efficiency):
-        axes[1, 0].text(bar.get_x() + bar.get_width()/2, bar.get_height() + max(efficiency)*0.01,
-                       f'${value:.2f}', ha='center', va='bottom')
-    
-    # Comparativo multi-métrica
-    metrics_df = pd.DataFrame({
-        'Simulation': sim_names,
-        'Earnings': earnings,
-        'Utilization': utilizations,
-        'Efficiency': efficiency
-    })
-    
-    # Normalizar para comparação visual
-    metrics_norm = metrics_df.copy()
-    for col in ['Earnings', 'Utilization', 'Efficiency']:
-        metrics_norm[col] = (metrics_norm[col] - metrics_norm[col].min()) / (metrics_norm[col].max() - metrics_norm[col].min())
+    axes[1, 0].bar_label(bars2, labels=[f'${value:.2f}' for value in efficiency], padding=3)
+    
+    # Comparativo multi-métrica, normalizado para comparação visual
+    earnings_norm, utilizations_norm, efficiency_norm = normalize_columns(
+        np.column_stack([earnings, utilizations, efficiency])
+    ).T
     
     x = np.arange(len(sim_names))
     width = 0.25
     
-    axes[1, 1].bar(x - width, metrics_norm['Earnings'], width, label='Earnings (norm)', alpha=0.8)
-    axes[1, 1].bar(x, metrics_norm['Utilization'], width, label='Utilization (norm)', alpha=0.8)
-    axes[1, 1].bar(x + width, metrics_norm['Efficiency'], width, label='Efficiency (norm)', alpha=0.8)
+    axes[1, 1].bar(x - width, earnings_norm, width, label='Earnings (norm)', alpha=0.8)
+    axes[1, 1].bar(x, utilizations_norm, width, label='Utilization (norm)', alpha=0.8)
+    axes[1, 1].bar(x + width, efficiency_norm, width, label='Efficiency (norm)', alpha=0.8)
     
     axes[1, 1].set_xlabel('Simulações')
     axes[1, 1].set_ylabel('Valores Normalizados')
@@ -254,12 +299,23 @@ def create_economic_analysis_chart(results):
     axes[1, 1].set_xticklabels(sim_names, rotation=45)
     axes[1, 1].legend()
     
-    plt.tight_layout()
-    plt.savefig('results/economic_analysis.png', dpi=300, bbox_inches='tight')
+    plt.savefig('results/economic_analysis.png', **SAVE_KW)
+    plt.close(fig)  # Libera a figura (e todos os artistas) antes do próximo gráfico
     print("💰 Gráfico de análise econômica salvo: results/economic_analysis.png")
 
-def generate_all_graphs():
-    """Gera todos os gráficos"""
+# Gráficos independentes: mesma entrada, arquivos de saída distintos
+CHARTS = (
+    create_performance_comparison_chart,
+    create_statistical_analysis_chart,
+    create_economic_analysis_chart
+)
+
+def generate_all_graphs(force=False):
+    """Gera todos os gráficos (a menos que já estejam atualizados)"""
+    if not force and graphs_up_to_date():
+        print("✅ Gráficos já atualizados em relação aos resultados (use --force para regenerar)")
+        return
+    
     print("📈 Gerando gráficos das simulações...")
     
     # Carregar resultados
@@ -272,15 +328,25 @@ def generate_all_graphs():
     
     # Gerar gráficos
     try:
-        create_performance_comparison_chart(results)
-        create_statistical_analysis_chart(results)
-        create_economic_analysis_chart(results)
+        workers = min(len(CHARTS), os.cpu_count() or 1)
+        if workers > 1:
+            # Cada processo rasteriza e codifica o seu PNG em paralelo
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for future in [pool.submit(chart, results) for chart in CHARTS]:
+                    future.result()
+        else:
+            for chart in CHARTS:
+                chart(results)
         
         print("✅ Todos os gráficos foram gerados com sucesso!")
         print("📁 Gráficos salvos em: results/")
         
     except Exception as e:
         print(f"❌ Erro ao gerar gráficos: {e}")
+    finally:
+        # Uma figura interrompida por erro não fica presa no registro do pyplot
+        if plt is not None:
+            plt.close('all')
 
 if __name__ == "__main__":
-    generate_all_graphs()
+    generate_all_graphs(force="--force" in sys.argv)